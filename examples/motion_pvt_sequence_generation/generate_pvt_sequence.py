@@ -26,8 +26,15 @@ can only be generated in the following two cases:
 
 1-D, 2-D, and 3-D sample data is also provided and can be found in the
 subdirectory "sample_data".
+
+To regenerate many files at once, set BATCH_INPUT to a directory or glob
+pattern of input files. The files are then generated in parallel in a
+pool of processes, which write their output files as they finish, and
+any plots are shown once every file has been generated.
 """
 
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import glob
 import os
 
 import pvt
@@ -52,25 +59,98 @@ The directory to write the generated CSV files to.
 Specify this as None to not write the files, or as an empty string
 to write to the current directory.
 """
+BATCH_INPUT: str | None = None
+"""
+A directory or glob pattern of input files to generate in parallel, e.g. "paths/*.csv".
+
+Specify this as None to generate FILENAMES in DATA_DIRECTORY one at a time.
+"""
+MAX_WORKERS: int | None = None
+"""The maximum number of processes to use in batch mode. None uses every core."""
+CACHE_DIRECTORY: str | None = None
+"""
+The directory to cache generated sequences in, to skip generating unchanged files again.
+
+Specify this as None to not cache the sequences.
+"""
 
 # ------------------- Script Settings ----------------------
 
 
 def main() -> None:
     """Generate complete PVT sequences from underdefined input data."""
+    if BATCH_INPUT is not None:
+        generate_batch(BATCH_INPUT)
+        return
     for filename in FILENAMES:
-        # Generate the sequence
-        pvt_sequence = pvt.Sequence.from_csv(
-            os.path.join(DATA_DIRECTORY, filename), TARGET_SPEED, TARGET_ACCEL
-        )
+        pvt_sequence = generate_file(os.path.join(DATA_DIRECTORY, filename))
         if SHOW_PLOTS:
             # Plot the sequence
             plot_path_and_trajectory(pvt_sequence)
-        if OUTPUT_DIRECTORY is not None:
-            # Write the file with the same name plus a _generated suffix
-            base, extension = filename.rsplit(".", 1)
-            output_filename = f"{base}_generated.{extension}"
-            pvt_sequence.save_to_file(os.path.join(OUTPUT_DIRECTORY, output_filename))
+
+
+def generate_batch(pattern: str) -> None:
+    """
+    Generate complete PVT sequences from many input files in parallel.
+
+    :param pattern: A directory of CSV files, or a glob pattern of input files.
+    """
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*.csv")
+    input_paths = sorted(glob.glob(pattern))
+    input_names = {os.path.basename(path) for path in input_paths}
+    assert OUTPUT_DIRECTORY is None or len(input_names) == len(
+        input_paths
+    ), "The input files must have different names, so they don't overwrite each other's outputs."
+    sequences = {}
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {executor.submit(_generate_file_in_worker, path): path for path in input_paths}
+        for future in as_completed(futures):
+            input_path = futures[future]
+            try:
+                pvt_sequence = future.result()
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                print(f"Failed to generate {input_path}: {error!r}")
+                continue
+            print(f"Generated {input_path}")
+            if pvt_sequence is not None:
+                sequences[input_path] = pvt_sequence
+    # Plot the sequences once they have all been generated, in input order
+    for input_path in sorted(sequences):
+        plot_path_and_trajectory(sequences[input_path])
+
+
+def generate_file(input_path: str) -> pvt.Sequence:
+    """
+    Generate a complete PVT sequence from an input file, and write it to the output directory.
+
+    :param input_path: The path of the input file.
+    :return: The generated sequence.
+    """
+    # Generate the sequence, or load it from the cache if it was generated before
+    if CACHE_DIRECTORY is None:
+        pvt_sequence = pvt.Sequence.from_csv(input_path, TARGET_SPEED, TARGET_ACCEL)
+    else:
+        cache = pvt.SequenceCache(CACHE_DIRECTORY)
+        pvt_sequence = cache.from_csv(input_path, TARGET_SPEED, TARGET_ACCEL)
+    if OUTPUT_DIRECTORY is not None:
+        # Write the file with the same name plus a _generated suffix
+        base, extension = os.path.basename(input_path).rsplit(".", 1)
+        output_filename = f"{base}_generated.{extension}"
+        pvt_sequence.save_to_file(os.path.join(OUTPUT_DIRECTORY, output_filename))
+    return pvt_sequence
+
+
+def _generate_file_in_worker(input_path: str) -> pvt.Sequence | None:
+    """
+    Generate a PVT sequence from an input file in a batch worker process.
+
+    :param input_path: The path of the input file.
+    :return: The generated sequence if it is to be plotted, otherwise None, to
+        avoid sending it back to the main process.
+    """
+    pvt_sequence = generate_file(input_path)
+    return pvt_sequence if SHOW_PLOTS else None
 
 
 if __name__ == "__main__":
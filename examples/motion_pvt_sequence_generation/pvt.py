@@ -8,20 +8,32 @@ manipulating PVT points, segments, and sequences.
 # pylint: disable=too-many-lines
 
 from __future__ import annotations
+from bisect import bisect_right
+from collections import deque
+from contextlib import contextmanager
 import csv
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum, auto
-from functools import partial
-from itertools import accumulate
+from functools import cache, cached_property
+import hashlib
+from io import StringIO
+from itertools import islice
 import math
+import os
+from time import perf_counter
+from typing import Iterable, Iterator, Literal, TextIO
 
 import numpy as np
 from numpy import float64
-from numpy.typing import NDArray
-from scipy.integrate import quad  # type: ignore
-from scipy.interpolate import splev, splprep  # type: ignore
+from numpy.polynomial.legendre import leggauss
+from numpy.typing import ArrayLike, NDArray
+from scipy.interpolate import PchipInterpolator, PPoly, spalde, splev, splprep  # type: ignore
 from scipy.linalg import solve_banded  # type: ignore
-from scipy.optimize import bisect, newton  # type: ignore
+
+VelocityMethod = Literal["continuous_acceleration", "finite_difference"]
+"""The methods for generating undefined velocities from position-time data."""
+LimitQuantity = Literal["speed", "accel", "jerk"]
+"""The quantities whose limits are checked by Sequence.check_limits()."""
 
 
 @dataclass(frozen=True)
@@ -45,6 +57,184 @@ class Point:
         assert self.dim == len(self.velocity), "Position must have the same dimension as velocity."
 
 
+def _calculate_coefficients(
+    times: NDArray[float64], positions: NDArray[float64], velocities: NDArray[float64]
+) -> NDArray[float64]:
+    """
+    Calculate the cubic polynomial coefficients of the segments between a series of points.
+
+    This is a vectorized equivalent of _calculate_segment_coefficients(),
+    which calculates the coefficients of all segments at once.
+
+    :param times: The time of each point, with shape (n,).
+    :param positions: The position of each point, with shape (n, dim).
+    :param velocities: The velocity of each point, with shape (n, dim).
+    :return: The coefficients c0 to c3 of each segment, with shape (n - 1, dim, 4).
+    """
+    delta_times = np.diff(times)[:, np.newaxis]
+    delta_positions = np.diff(positions, axis=0)
+    vel_starts = velocities[:-1]
+    vel_ends = velocities[1:]
+    # Segments with zero duration have c2 = c3 = 0
+    inverse_delta_times = np.divide(
+        1, delta_times, out=np.zeros_like(delta_times), where=delta_times > 0
+    )
+    coefficients = np.empty((len(delta_times), positions.shape[1], 4))
+    coefficients[..., 0] = positions[:-1]
+    coefficients[..., 1] = vel_starts
+    coefficients[..., 2] = (
+        3 * delta_positions * inverse_delta_times - (2 * vel_starts + vel_ends)
+    ) * inverse_delta_times
+    coefficients[..., 3] = (
+        -2 * delta_positions * inverse_delta_times + (vel_starts + vel_ends)
+    ) * inverse_delta_times**2
+    return coefficients
+
+
+def _calculate_segment_coefficients(
+    delta_time: float,
+    pos_start: Iterable[float],
+    pos_end: Iterable[float],
+    vel_start: Iterable[float],
+    vel_end: Iterable[float],
+) -> list[tuple[float, float, float, float]]:
+    """
+    Calculate the cubic polynomial coefficients of a single segment.
+
+    :param delta_time: The duration of the segment.
+    :param pos_start: The position at the start of the segment, in each dimension.
+    :param pos_end: The position at the end of the segment, in each dimension.
+    :param vel_start: The velocity at the start of the segment, in each dimension.
+    :param vel_end: The velocity at the end of the segment, in each dimension.
+    :return: The coefficients c0 to c3 in each dimension.
+    """
+
+    def calculate_coefficients_1d(
+        pos_start: float, pos_end: float, vel_start: float, vel_end: float
+    ) -> tuple[float, float, float, float]:
+        """Calculate the coefficients in a single dimension."""
+        delta_pos = pos_end - pos_start
+        c0 = pos_start
+        c1 = vel_start
+        if delta_time > 0:
+            c2 = 3 * delta_pos / delta_time**2 - (2 * vel_start + vel_end) / delta_time
+            c3 = -2 * delta_pos / delta_time**3 + (vel_start + vel_end) / delta_time**2
+        else:
+            c2 = c3 = 0
+        return (c0, c1, c2, c3)
+
+    return [
+        calculate_coefficients_1d(*parameters)
+        for parameters in zip(pos_start, pos_end, vel_start, vel_end)
+    ]
+
+
+@cache
+def _gauss_legendre(order: int) -> tuple[NDArray[float64], NDArray[float64]]:
+    """
+    Return the nodes and weights of Gauss-Legendre quadrature over [-1, 1].
+
+    :param order: The number of nodes.
+    """
+    nodes, weights = leggauss(order)  # type: ignore
+    return nodes, weights
+
+
+def _read_only(array: NDArray[float64]) -> NDArray[float64]:
+    """
+    Return a read-only view of an array.
+
+    :param array: The array to view.
+    """
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+@dataclass
+class PhaseProfile:
+    """The statistics of one phase of PVT generation."""
+
+    calls: int = 0
+    """The number of times the phase ran."""
+    time: float = 0.0
+    """The total wall time spent in the phase, in seconds."""
+    points: int = 0
+    """The total number of points the phase processed."""
+
+
+@dataclass
+class GenerationProfile:
+    """The statistics of PVT generation collected by profile_generation()."""
+
+    phases: dict[str, PhaseProfile] = field(default_factory=dict)
+    """The statistics of each phase, in the order the phases first ran."""
+    counters: dict[str, int] = field(default_factory=dict)
+    """The number of times each costly operation ran, such as spline evaluations."""
+
+    def add_phase(self, name: str, start: float, points: int) -> float:
+        """
+        Record a run of a phase.
+
+        :param name: The name of the phase.
+        :param start: The perf_counter() time at which the phase started.
+        :param points: The number of points the phase processed.
+        :return: The current perf_counter() time, to start the next phase from.
+        """
+        end = perf_counter()
+        phase = self.phases.setdefault(name, PhaseProfile())
+        phase.calls += 1
+        phase.time += end - start
+        phase.points += points
+        return end
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """
+        Count runs of a costly operation.
+
+        :param name: The name of the operation.
+        :param amount: The number of runs.
+        """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def report(self) -> str:
+        """Return a table of the statistics of each phase, followed by the counters."""
+        lines = [f"{'Phase':<20} {'Calls':>8} {'Time (ms)':>12} {'Points':>10}"]
+        lines += [
+            f"{name:<20} {phase.calls:>8} {phase.time * 1e3:>12.3f} {phase.points:>10}"
+            for name, phase in self.phases.items()
+        ]
+        lines += [f"{name:<20} {count:>8}" for name, count in self.counters.items()]
+        return "\n".join(lines)
+
+
+_profile: GenerationProfile | None = None  # pylint: disable=invalid-name
+"""The profile being collected, or None if profiling is disabled."""
+
+
+@contextmanager
+def profile_generation() -> Iterator[GenerationProfile]:
+    """
+    Collect the statistics of PVT generation within a with block.
+
+    The time spent in each phase of generation, such as fitting the spline or
+    finding the speed limits, is recorded along with the number of times it ran
+    and the points it processed, and costly operations like spline evaluations
+    and Newton steps are counted. When not profiling, the instrumentation only
+    checks whether a profile is being collected. Profiles are not thread-safe.
+
+    :return: A context manager providing the profile, which is filled in as
+        generation runs.
+    """
+    global _profile  # pylint: disable=global-statement
+    previous_profile = _profile
+    _profile = GenerationProfile()
+    try:
+        yield _profile
+    finally:
+        _profile = previous_profile
+
+
 class Segment:
     """A PVT segment, formed from two PVT points."""
 
@@ -75,6 +265,11 @@ class Segment:
         """The dimension of the points."""
         return self.start_point.dim
 
+    @property
+    def coefficients(self) -> list[tuple[float, float, float, float]]:
+        """The cubic polynomial coefficients of the segment in each dimension, from c0 to c3."""
+        return self._coefficients.copy()
+
     def position(self, time: float) -> tuple[float, ...]:
         """
         Calculate the position at a given time.
@@ -112,33 +307,15 @@ class Segment:
 
     def _calculate_coefficients(self) -> None:
         """Calculate the polynomial coefficients."""
-
-        def calculate_coefficients_1d(
-            delta_time: float, pos_start: float, pos_end: float, vel_start: float, vel_end: float
-        ) -> tuple[float, float, float, float]:
-            """Calculate the coefficients in a single dimension."""
-            delta_pos = pos_end - pos_start
-            c0 = pos_start
-            c1 = vel_start
-            if delta_time > 0:
-                c2 = 3 * delta_pos / delta_time**2 - (2 * vel_start + vel_end) / delta_time
-                c3 = -2 * delta_pos / delta_time**3 + (vel_start + vel_end) / delta_time**2
-            else:
-                c2 = c3 = 0
-            return (c0, c1, c2, c3)
-
         delta_time = self.end_point.time - self.start_point.time
         assert delta_time >= 0, "The time at point 2 must be greater than the time at point 1"
-        self._coefficients = [
-            calculate_coefficients_1d(
-                delta_time,
-                self.start_point.position[i],
-                self.end_point.position[i],
-                self.start_point.velocity[i],
-                self.end_point.velocity[i],
-            )
-            for i in range(self.dim)
-        ]
+        self._coefficients = _calculate_segment_coefficients(
+            delta_time,
+            self.start_point.position,
+            self.end_point.position,
+            self.start_point.velocity,
+            self.end_point.velocity,
+        )
 
     def _validate_time(self, time: float) -> None:
         """
@@ -167,26 +344,67 @@ class GeometricPath:
         :param position_sequences: A list of position sequences, one
         for each dimension.
         """
+        profile = _profile
+        start = perf_counter() if profile is not None else 0.0
         self._dim = len(position_sequences)
         tck, u = splprep(  # pylint: disable=unbalanced-tuple-unpacking
             position_sequences, s=0, full_output=0
         )
+        if profile is not None:
+            start = profile.add_phase("spline fit", start, len(u))
         self._tck: tuple[NDArray[float64], list[NDArray[float64]], int] = tck
         self._u: list[float] = list(u)
-        self._length_at_u = list(
-            accumulate(
-                (
-                    self._calculate_segment_length(u0, uf)
-                    for u0, uf in zip(self._u[:-1], self._u[1:])
-                ),
-                initial=0,
+        self._derivative_cache: dict[float, tuple[tuple[float, ...], ...]] = {}
+        # Build a table of the cumulative path length at evenly spaced subdivisions of
+        # each interval between keypoints. The points where any axis changes direction
+        # are also included, since the derivative of path length has a kink there if
+        # all axes stop at once, which would spoil the accuracy of the quadrature.
+        subdivisions = (
+            u[:-1, np.newaxis]
+            + np.diff(u)[:, np.newaxis]
+            * np.arange(self.ARC_LENGTH_SUBDIVISIONS)
+            / self.ARC_LENGTH_SUBDIVISIONS
+        )
+        self._table_u, entry_lengths = self._refine_arc_length_table(
+            np.unique(
+                np.concatenate((subdivisions.reshape(-1), [u[-1]], self._calculate_stationary_u()))
             )
         )
+        self._table_length = np.append(0, np.cumsum(entry_lengths))
+        # Build a monotone interpolant of the inverse of the table, skipping any
+        # entries that don't add length
+        unique_lengths, unique_indices = np.unique(self._table_length, return_index=True)
+        self._u_at_length = PchipInterpolator(unique_lengths, self._table_u[unique_indices])
+        if profile is not None:
+            profile.add_phase("arc length table", start, len(self._table_u))
+
+    ARC_LENGTH_SUBDIVISIONS = 4
+    """The number of arc length table entries between each pair of keypoints."""
+    ARC_LENGTH_TOLERANCE = 1e-10
+    """
+    The tolerance of the length of each arc length table entry.
+
+    The tolerance is relative to the length of the entry, or absolute for entries
+    shorter than one unit, so that very short entries are not held to a tolerance
+    below the rounding error of the total path length.
+    """
+    MAX_ARC_LENGTH_REFINEMENTS = 30
+    """The maximum number of times the arc length table entries are split to meet the tolerance."""
+    GAUSS_LEGENDRE_ORDER = 5
+    """The number of Gauss-Legendre nodes used to integrate the arc length of each table entry."""
+    DERIVATIVE_CACHE_SIZE = 64
+    """The number of parameterized lengths whose derivatives are cached."""
+    MAX_NEWTON_ITERATIONS = 10
+    """The maximum number of Newton steps used to refine u at a given length."""
+    MAX_REVERSAL_ITERATIONS = 100
+    """The maximum number of steps used to locate the points where an axis changes direction."""
+    REVERSAL_TOLERANCE = 2e-12
+    """The tolerance in u to which the points where an axis changes direction are located."""
 
     @property
     def length(self) -> float:
         """The length of the path."""
-        return self._length_at_u[-1]
+        return float(self._table_length[-1])
 
     @property
     def parameterized_lengths(self) -> list[float]:
@@ -204,10 +422,53 @@ class GeometricPath:
 
         :param u: The parameterized length u.
         """
-        # By default, splev returns an array for each element. Pick
-        # the one and only value by flattening the arrays.
-        val = splev(u, self._tck)
-        return tuple(val[i].flat[0] for i in range(self._dim))
+        return self.derivatives(u)[0]
+
+    def derivatives(self, u: float) -> tuple[tuple[float, ...], ...]:
+        """
+        Return the N-D path position and its first three derivatives with respect to u.
+
+        The derivatives are evaluated together in a single pass over the
+        spline, and the most recent results are cached so that quantities
+        built from several derivatives at the same u, such as the direction,
+        curvature, and rate of change of path length, share one evaluation.
+
+        :param u: The parameterized length u.
+        :return: The position, followed by the first, second, and third
+            derivatives of position with respect to u.
+        """
+        u = float(u)
+        if (cached := self._derivative_cache.get(u)) is not None:
+            return cached
+        derivatives = tuple(
+            tuple(derivative) for derivative in np.array(spalde(u, self._tck)).T.tolist()
+        )
+        if _profile is not None:
+            _profile.count("spalde")
+        if len(self._derivative_cache) >= self.DERIVATIVE_CACHE_SIZE:
+            del self._derivative_cache[next(iter(self._derivative_cache))]
+        self._derivative_cache[u] = derivatives
+        return derivatives
+
+    def calc_derivatives(self, u_values: ArrayLike) -> NDArray[float64]:
+        """
+        Return the N-D path position and its first three derivatives at each parameterized length.
+
+        This is the vectorized form of derivatives(), with one spline
+        evaluation per derivative for all of the parameterized lengths.
+
+        :param u_values: The parameterized lengths u.
+        :return: An array of shape (4, number of lengths, dim) holding the position,
+            followed by the first, second, and third derivatives of position with
+            respect to u.
+        """
+        u_array = np.asarray(u_values, dtype=float64).reshape(-1)
+        if _profile is not None:
+            _profile.count("splev", 4)
+        derivatives: NDArray[float64] = np.array(
+            [splev(u_array, self._tck, derivative_number) for derivative_number in range(4)]
+        ).transpose(0, 2, 1)
+        return derivatives
 
     def direction(self, u: float) -> tuple[float, ...]:
         """
@@ -246,14 +507,79 @@ class GeometricPath:
             speed**2 * d2x_dl2_i + accel * dx_dl_i for dx_dl_i, d2x_dl2_i in zip(dx_dl, d2x_dl2)
         )
 
-    def _calculate_segment_length(self, u0: float, uf: float) -> float:
+    def calc_lengths_at_u(self, u_values: ArrayLike) -> NDArray[float64]:
         """
-        Calculate the path length between u0 and uf.
+        Return the path length from the start of the path to each parameterized length.
 
-        :param u0: The start point of the measurement, in parameterized units.
-        :param uf: The end point of the measurement, in parameterized units.
+        Lengths are looked up in a precomputed cumulative arc length table,
+        and the remainder past the nearest table entry is integrated with
+        fixed-order Gauss-Legendre quadrature, all in a single vectorized pass.
+
+        :param u_values: The parameterized lengths u.
         """
-        return float(quad(self.dl_du, u0, uf)[0])
+        u_array = np.asarray(u_values, dtype=float64)
+        indices = np.clip(
+            np.searchsorted(self._table_u, u_array, side="right") - 1, 0, len(self._table_u) - 2
+        )
+        table_u = self._table_u[indices]
+        lengths: NDArray[float64] = self._table_length[indices] + self._integrate_dl_du(
+            table_u.reshape(-1), u_array.reshape(-1)
+        ).reshape(u_array.shape)
+        return lengths
+
+    def calc_axis_reversals(  # pylint: disable=too-many-locals
+        self, u_values: ArrayLike
+    ) -> tuple[NDArray[np.intp], NDArray[np.intp], NDArray[float64]]:
+        """
+        Return the points where an axis changes direction between consecutive parameterized lengths.
+
+        The direction of every axis is found with a single spline evaluation over
+        all of the parameterized lengths, and a reversal is reported wherever it
+        changes sign between neighbours. The reversals are then located together,
+        using Newton steps that fall back to bisection whenever a step would leave
+        the interval bracketing the reversal.
+
+        :param u_values: The parameterized lengths u, in increasing order.
+        :return: The index of the interval containing each reversal, the axis that
+            reverses, and the parameterized length of the reversal, sorted by
+            parameterized length.
+        """
+        u_array = np.asarray(u_values, dtype=float64)
+        dx_du = np.array(splev(u_array, self._tck, 1))
+        axes, intervals = np.nonzero(dx_du[:, :-1] * dx_du[:, 1:] < 0)
+        if _profile is not None:
+            _profile.count("splev")
+        lower = u_array[intervals]
+        upper = u_array[intervals + 1]
+        lower_signs = np.sign(dx_du[axes, intervals])
+        roots = (lower + upper) / 2
+        reversal_indices = np.arange(len(roots))
+        for _ in range(self.MAX_REVERSAL_ITERATIONS if len(roots) > 0 else 0):
+            values = np.array(splev(roots, self._tck, 1))[axes, reversal_indices]
+            slopes = np.array(splev(roots, self._tck, 2))[axes, reversal_indices]
+            if _profile is not None:
+                _profile.count("splev", 2)
+                _profile.count("reversal iterations")
+            # Shrink each bracket to the side that still contains the reversal
+            below = np.sign(values) == lower_signs
+            lower = np.where(below, roots, lower)
+            upper = np.where(below, upper, roots)
+            steps = np.divide(values, slopes, out=np.full_like(values, np.inf), where=slopes != 0)
+            next_roots = np.where(
+                values == 0,
+                roots,
+                np.where(
+                    (roots - steps > lower) & (roots - steps < upper),
+                    roots - steps,
+                    (lower + upper) / 2,
+                ),
+            )
+            converged = np.all(np.abs(next_roots - roots) <= self.REVERSAL_TOLERANCE)
+            roots = next_roots
+            if converged:
+                break
+        order = np.lexsort((axes, roots))
+        return intervals[order], axes[order], roots[order]
 
     def segment_length(self, u0: float, uf: float) -> float:
         """
@@ -262,20 +588,85 @@ class GeometricPath:
         :param u0: The start point of the measurement, in parameterized units.
         :param uf: The end point of the measurement, in parameterized units.
         """
-        first_index_after_u0 = next((i for i, u in enumerate(self._u) if u >= u0), len(self._u) - 1)
-        last_index_before_uf = next(
-            (i - 1 for i, u in enumerate(self._u) if u > uf), len(self._u) - 1
+        length_u0, length_uf = self.calc_lengths_at_u([u0, uf])
+        return float(length_uf - length_u0)
+
+    def _calculate_stationary_u(self) -> NDArray[float64]:
+        """Return the parameterized lengths inside the path where any axis is stationary."""
+        t, c, k = self._tck
+        roots = np.concatenate(
+            [PPoly.from_spline((t, c_i, k)).derivative().roots(extrapolate=False) for c_i in c]
         )
-        if last_index_before_uf >= first_index_after_u0 - 1 or last_index_before_uf < 0:
-            return self._calculate_segment_length(u0, uf)
+        stationary_u: NDArray[float64] = roots[(roots > 0) & (roots < 1)]
+        return stationary_u
+
+    def _refine_arc_length_table(
+        self, table_u: NDArray[float64]
+    ) -> tuple[NDArray[float64], NDArray[float64]]:
+        """
+        Split the arc length table entries that are not accurate enough.
+
+        Where the path nearly stops, such as close to a cusp, the derivative of path
+        length changes too sharply for a single quadrature per entry. Each entry is
+        integrated whole and in two halves, and the entries whose length changes
+        by more than the tolerance are split in two and checked again.
+
+        :param table_u: The parameterized lengths of the entries of the table, in
+            increasing order, ending with the end of the path.
+        :return: The parameterized lengths of the entries of the refined table, in the
+            same form, and the path length of each entry.
+        """
+        u_starts, u_ends = table_u[:-1], table_u[1:]
+        whole_lengths = self._integrate_dl_du(u_starts, u_ends)
+        refined_u = [u_starts[:0]]
+        refined_lengths = [whole_lengths[:0]]
+        for _ in range(self.MAX_ARC_LENGTH_REFINEMENTS):
+            u_middles = (u_starts + u_ends) / 2
+            first_lengths = self._integrate_dl_du(u_starts, u_middles)
+            second_lengths = self._integrate_dl_du(u_middles, u_ends)
+            split = np.abs(first_lengths + second_lengths - whole_lengths) > (
+                self.ARC_LENGTH_TOLERANCE * np.maximum(whole_lengths, 1)
+            )
+            refined_u.append(u_starts[~split])
+            refined_lengths.append(first_lengths[~split] + second_lengths[~split])
+            u_starts, u_ends, whole_lengths = (
+                np.concatenate((u_starts[split], u_middles[split])),
+                np.concatenate((u_middles[split], u_ends[split])),
+                np.concatenate((first_lengths[split], second_lengths[split])),
+            )
+            if len(u_starts) == 0:
+                break
+        refined_u.append(u_starts)
+        refined_lengths.append(whole_lengths)
+        order = np.argsort(np.concatenate(refined_u))
+        return (
+            np.append(np.concatenate(refined_u)[order], table_u[-1]),
+            np.concatenate(refined_lengths)[order],
+        )
+
+    def _integrate_dl_du(
+        self, u_starts: NDArray[float64], u_ends: NDArray[float64]
+    ) -> NDArray[float64]:
+        """
+        Integrate the derivative of path length over a set of intervals.
 
-        length = self._calculate_segment_length(u0, self._u[first_index_after_u0])
-        length += self._length_at_u[last_index_before_uf] - self._length_at_u[first_index_after_u0]
-        length += self._calculate_segment_length(self._u[last_index_before_uf], uf)
-        assert (uf >= u0) == (
-            length >= 0
-        ), f"{u0} {uf} {first_index_after_u0} {last_index_before_uf}"
-        return length
+        The integration uses fixed-order Gauss-Legendre quadrature, with a single
+        spline evaluation for all of the intervals.
+
+        :param u_starts: The start of each interval, in parameterized units.
+        :param u_ends: The end of each interval, in parameterized units.
+        :return: The path length over each interval.
+        """
+        nodes, weights = _gauss_legendre(self.GAUSS_LEGENDRE_ORDER)
+        half_widths = (u_ends - u_starts)[:, np.newaxis] / 2
+        u_nodes = (u_starts + u_ends)[:, np.newaxis] / 2 + half_widths * nodes
+        dx_du = np.array(splev(u_nodes.reshape(-1), self._tck, 1))
+        if _profile is not None:
+            _profile.count("splev")
+            _profile.count("quadratures", len(u_starts))
+        dl_du = np.linalg.norm(dx_du, axis=0).reshape(u_nodes.shape)
+        lengths: NDArray[float64] = (half_widths * dl_du) @ weights
+        return lengths
 
     def calc_u_at_length(self, length: float) -> float:
         """
@@ -283,20 +674,53 @@ class GeometricPath:
 
         :param length: The length at which we want to calculate u.
         """
-        # Find an estimate of u via linear interpolation
-        u_estimate = np.interp(length, self._length_at_u, self._u)
-        i0 = next((i - 1 for i, u in enumerate(self._u) if u > u_estimate), len(self._u) - 1)
-        u0 = self._u[i0]
-
-        # Calculate u using an optimization algorithm
-        delta_len = length - self._length_at_u[i0]
-        u: float = newton(
-            lambda u: self.segment_length(u0, u) - delta_len,
-            u_estimate,
-            self.dl_du,
-            fprime2=self.d2l_du2,
+        return float(self.calc_u_at_lengths([length])[0])
+
+    def calc_u_at_lengths(
+        self, lengths: ArrayLike, tolerance: float | None = 1e-9
+    ) -> NDArray[float64]:
+        """
+        Return the parameterization lengths for an array of real lengths.
+
+        Each u is first estimated with a monotone interpolant of the inverse
+        of the arc length table, which is built once when the path is created.
+        Estimates whose length misses the target by more than the tolerance
+        are then refined together with vectorized Newton steps.
+
+        :param lengths: The lengths at which we want to calculate u. These are
+            clipped to the range from zero to the length of the path.
+        :param tolerance: The maximum error in length, or None to skip refinement
+            and return the interpolated estimates.
+        """
+        length_array = np.clip(np.asarray(lengths, dtype=float64), 0, self.length)
+        u_array: NDArray[float64] = np.clip(self._u_at_length(length_array), 0, 1)
+        if tolerance is None:
+            return u_array
+
+        # Keep each u between the table entries on either side of its length
+        flat_lengths = length_array.reshape(-1)
+        flat_u = u_array.reshape(-1)
+        indices = np.clip(
+            np.searchsorted(self._table_length, flat_lengths, side="right") - 1,
+            0,
+            len(self._table_u) - 2,
         )
-        return u
+        u_min = self._table_u[indices]
+        u_max = self._table_u[indices + 1]
+        refine = np.arange(len(flat_u))
+        for _ in range(self.MAX_NEWTON_ITERATIONS):
+            errors = self.calc_lengths_at_u(flat_u[refine]) - flat_lengths[refine]
+            inaccurate = np.abs(errors) > tolerance
+            refine = refine[inaccurate]
+            if len(refine) == 0:
+                break
+            dl_du = np.linalg.norm(np.array(splev(flat_u[refine], self._tck, 1)), axis=0)
+            steps = np.divide(errors[inaccurate], dl_du, out=np.zeros_like(dl_du), where=dl_du > 0)
+            if _profile is not None:
+                _profile.count("splev")
+                _profile.count("newton iterations")
+            flat_u[refine] = np.clip(flat_u[refine] - steps, u_min[refine], u_max[refine])
+        return flat_u.reshape(u_array.shape)
 
     def dx_du(self, u: float, derivative_number: float = 1) -> tuple[float, ...]:
         """
@@ -305,6 +729,8 @@ class GeometricPath:
         :param u: The parameterized length u.
         :param derivative_number: The derivative (defaults to the first derivative).
         """
+        if derivative_number in (0, 1, 2, 3):
+            return self.derivatives(u)[int(derivative_number)]
         # By default, splev returns an array for each element. Pick
         # the one and only value by flattening the arrays.
         val = splev(u, self._tck, derivative_number)
@@ -365,6 +791,519 @@ class GeometricPath:
         )
 
 
+def _resample_path(geo_path: GeometricPath, resample_number: int | None) -> NDArray[float64]:
+    """
+    Return the parameterized lengths at which to sample a path.
+
+    :param geo_path: The path to sample.
+    :param resample_number: The number of points spaced evenly along the path, or None
+        to use the keypoints of the path.
+    """
+    if resample_number is None:
+        return np.array(geo_path.parameterized_lengths)
+    return np.concatenate(
+        (
+            [0.0],
+            geo_path.calc_u_at_lengths(np.linspace(0, geo_path.length, resample_number)[1:-1]),
+            [1.0],
+        )
+    )
+
+
+def _generate_calculation_points(
+    u_sample: NDArray[float64], geo_path: GeometricPath
+) -> tuple[NDArray[float64], NDArray[np.intp]]:
+    """
+    Generate the critical points used for calculating the speed profile along a path.
+
+    This function generates the calculation points by:
+    - Adding intermediate points between the sample points, and
+    - Adding critical points, or points where one or more axis changes direction
+
+    :param u_sample: The parameterized lengths of the sample points, in increasing order.
+    :param geo_path: The path being sampled.
+    :return: The parameterized lengths of the calculation points, and the number of axes
+        that change direction at each of them.
+    """
+    # For each sample point, use N points in calculations
+    u_grid = np.append(
+        u_sample[:-1, np.newaxis] + (np.diff(u_sample) / 10)[:, np.newaxis] * np.arange(10),
+        u_sample[-1],
+    )
+
+    # Find points where axes change directions. A reversal that is close to the
+    # previous point in its interval is assigned to that point, rather than
+    # being inserted as a point of its own.
+    intervals, _, u_reversals = geo_path.calc_axis_reversals(u_grid)
+    same_interval = np.append(False, intervals[1:] == intervals[:-1])
+    previous_u = np.where(same_interval, np.roll(u_reversals, 1), u_grid[intervals])
+    inserted = ~np.isclose(u_reversals, previous_u, rtol=1e-9, atol=0)
+    insert_positions = intervals[inserted] + 1
+    u_calc = np.insert(u_grid, insert_positions, u_reversals[inserted])
+
+    # Find the index of each reversal in the merged points
+    grid_indices = intervals + np.searchsorted(insert_positions, intervals, side="right")
+    inserted_indices = intervals + np.cumsum(inserted)
+    last_inserted = np.maximum.accumulate(np.where(inserted, np.arange(len(intervals)), -1)).clip(0)
+    reversal_indices = np.where(
+        (intervals[last_inserted] == intervals) & inserted[last_inserted],
+        inserted_indices[last_inserted],
+        grid_indices,
+    )
+    return u_calc, np.bincount(reversal_indices, minlength=len(u_calc))
+
+
+def _calculate_length_derivatives(
+    dx_du: NDArray[float64], d2x_du2: NDArray[float64]
+) -> tuple[NDArray[float64], NDArray[float64]]:
+    """
+    Return the first and second derivatives of position with respect to path length.
+
+    This is the vectorized form of GeometricPath.dx_dl() and GeometricPath.d2x_dl2().
+    Both derivatives are zero wherever the path stops.
+
+    :param dx_du: The first derivative of position with respect to u, one row per point.
+    :param d2x_du2: The second derivative of position with respect to u, one row per point.
+    """
+    dl_du = np.linalg.norm(dx_du, axis=1, keepdims=True)
+    moving = dl_du > 0
+    dl_du = np.where(moving, dl_du, 1)
+    d2l_du2 = np.sum(dx_du * d2x_du2, axis=1, keepdims=True) / dl_du
+    dx_dl = np.where(moving, dx_du / dl_du, 0)
+    d2x_dl2 = np.where(moving, d2x_du2 / dl_du**2 - dx_du * d2l_du2 / dl_du**3, 0)
+    return dx_dl, d2x_dl2
+
+
+def generate_speeds_time_optimal(  # pylint: disable=too-many-locals
+    geo_path: GeometricPath,
+    u_values: ArrayLike,
+    max_speeds: ArrayLike,
+    max_accels: ArrayLike,
+    stops: ArrayLike | None = None,
+) -> NDArray[float64]:
+    """
+    Generate the fastest speeds along a path that keep every axis within its limits.
+
+    This is a time-optimal path parameterization in the style of TOPP-RA. The path
+    is discretized at the given parameterized lengths, and the tangential acceleration
+    a is held constant between neighbouring points, so that the squared speed b = v²
+    changes linearly with path length. At each point, axis i has velocity x'ᵢv and
+    acceleration x'ᵢa + x''ᵢb, where x' and x'' are the derivatives of position with
+    respect to path length. Each axis acceleration limit is therefore a pair of
+    affine bounds on a, -qᵢ - pᵢb <= a <= qᵢ - pᵢb.
+
+    The maximum velocity curve, or the largest b at each point for which some a
+    satisfies every bound, is found for all points at once from the intersections
+    of each lower bound with each upper bound. A backward pass then finds the largest
+    b at each point from which the path can still stop at its end, and a forward
+    pass accelerates from rest as hard as the limits and the backward pass allow.
+
+    The limits are respected at each of the given points, and only approximately
+    in between, so denser points give a closer result.
+
+    :param geo_path: The path to traverse, starting and ending at rest.
+    :param u_values: The parameterized lengths at which to calculate speeds,
+        in increasing order.
+    :param max_speeds: The maximum speed of each axis, or one maximum speed for all axes.
+    :param max_accels: The maximum acceleration of each axis, or one maximum acceleration
+        for all axes.
+    :param stops: Whether the path must come to rest at each of the parameterized lengths,
+        such as where every axis changes direction, or None to only stop at the ends.
+    :return: The speed along the path at each of the parameterized lengths.
+    """
+    u_array = np.asarray(u_values, dtype=float64)
+    derivatives = geo_path.calc_derivatives(u_array)
+    dx_dl, d2x_dl2 = _calculate_length_derivatives(derivatives[1], derivatives[2])
+    speed_limits = np.broadcast_to(np.asarray(max_speeds, dtype=float64), dx_dl.shape[1:])
+    accel_limits = np.broadcast_to(np.asarray(max_accels, dtype=float64), dx_dl.shape[1:])
+    double_lengths = 2 * np.diff(geo_path.calc_lengths_at_u(u_array))[:, np.newaxis]
+
+    # Write each acceleration limit as bounds on a. An axis that isn't moving along
+    # the path doesn't bound a, but limits b through its centripetal acceleration.
+    moving = dx_dl != 0
+    abs_dx_dl = np.where(moving, np.abs(dx_dl), 1)
+    slopes = np.where(moving, d2x_dl2 / np.where(moving, dx_dl, 1), 0)
+    offsets = np.where(moving, accel_limits / abs_dx_dl, np.inf)
+
+    # Calculate the maximum velocity curve
+    bounds = [
+        np.min(np.where(moving, (speed_limits / abs_dx_dl) ** 2, np.inf), axis=1),
+        np.min(
+            np.divide(
+                accel_limits,
+                np.abs(d2x_dl2),
+                out=np.full_like(d2x_dl2, np.inf),
+                where=~moving & (d2x_dl2 != 0),
+            ),
+            axis=1,
+        ),
+        # Each lower bound on a must not exceed each upper bound: (pⱼ - pᵢ)b <= qᵢ + qⱼ
+        np.min(
+            np.divide(
+                offsets[:, :, np.newaxis] + offsets[:, np.newaxis, :],
+                slopes[:, np.newaxis, :] - slopes[:, :, np.newaxis],
+                out=np.full(slopes.shape + slopes.shape[1:], np.inf),
+                where=slopes[:, np.newaxis, :] > slopes[:, :, np.newaxis],
+            ),
+            axis=(1, 2),
+        ),
+        np.where(moving.any(axis=1), np.inf, 0),
+    ]
+    # Over the step from each point, b must also not fall below zero: b(2Δl·pⱼ - 1) <= 2Δl·qⱼ
+    denominators = 1 - double_lengths * slopes[:-1]
+    bounds.append(
+        np.append(
+            np.min(
+                np.divide(
+                    double_lengths * offsets[:-1],
+                    -denominators,
+                    out=np.full_like(denominators, np.inf),
+                    where=denominators < 0,
+                ),
+                axis=1,
+            ),
+            np.inf,
+        )
+    )
+    max_squared_speeds = np.minimum.reduce(bounds)
+    max_squared_speeds[[0, -1]] = 0
+    if stops is not None:
+        # The derivatives at a reversal are only approximately zero, so stop explicitly
+        max_squared_speeds[np.asarray(stops, dtype=bool)] = 0
+
+    # Calculate the largest b from which each step can still reach the next point's limit,
+    # b(1 - 2Δl·pᵢ) <= b_next + 2Δl·qᵢ, from the end point
+    additions = np.where(denominators > 0, double_lengths * offsets[:-1], np.inf).tolist()
+    denominators = np.where(denominators > 0, denominators, 1).tolist()
+    squared_speeds: list[float] = max_squared_speeds.tolist()
+    for i in reversed(range(len(additions))):
+        squared_speeds[i] = min(
+            squared_speeds[i],
+            min(
+                (squared_speeds[i + 1] + addition) / denominator
+                for addition, denominator in zip(additions[i], denominators[i])
+            ),
+        )
+
+    # Accelerate as hard as possible from the start point
+    slope_rows = slopes.tolist()
+    offset_rows = offsets.tolist()
+    for i, double_length in enumerate(double_lengths[:, 0].tolist()):
+        accel = min(
+            offset - slope * squared_speeds[i]
+            for offset, slope in zip(offset_rows[i], slope_rows[i])
+        )
+        squared_speeds[i + 1] = max(
+            min(squared_speeds[i + 1], squared_speeds[i] + double_length * accel), 0
+        )
+    speeds: NDArray[float64] = np.sqrt(np.maximum(squared_speeds, 0))
+    return speeds
+
+
+def _filter_speed_profile(  # pylint: disable=too-many-locals
+    times: NDArray[float64],
+    lengths: NDArray[float64],
+    speeds: NDArray[float64],
+    window: float,
+    stops: NDArray[np.bool_] | None = None,
+) -> tuple[NDArray[float64], NDArray[float64]]:
+    """
+    Smooth a speed profile along a path with a moving average filter.
+
+    The profile is given by the time, path length, and speed at each of its points,
+    with constant acceleration in between. Its path length is replaced by the average
+    over the preceding window of time, which filters the speed and acceleration the
+    same way, and makes the profile one window longer. If the acceleration of the
+    profile is within ±A, then filtering with a window of 2A/J keeps its jerk within
+    ±J, which turns a trapezoidal speed profile into an S-curve.
+
+    Points where the path must come to rest are kept at rest by filtering each
+    stretch between them on its own, which makes the profile one window longer
+    for each stretch.
+
+    :param times: The time of each point, in increasing order.
+    :param lengths: The path length of each point, in increasing order.
+    :param speeds: The speed along the path at each point.
+    :param window: The length of the moving average, in units of time.
+    :param stops: Whether the profile must stay at rest at each point, or None to only
+        stay at rest at the ends.
+    :return: The times at which the filtered profile reaches each point, and its
+        speeds there.
+    """
+    if stops is not None and np.any(stops[1:-1]):
+        # Each stretch starts when the one before it ends, one window later than before
+        stop_indices = np.concatenate(([0], np.flatnonzero(stops[1:-1]) + 1, [len(times) - 1]))
+        stretches = [
+            _filter_speed_profile(
+                times[start : end + 1], lengths[start : end + 1], speeds[start : end + 1], window
+            )
+            for start, end in zip(stop_indices[:-1].tolist(), stop_indices[1:].tolist())
+        ]
+        return (
+            np.concatenate(
+                [times[:1]]
+                + [stretch_times[1:] + i * window for i, (stretch_times, _) in enumerate(stretches)]
+            ),
+            np.concatenate([[0]] + [stretch_speeds[1:] for _, stretch_speeds in stretches]),
+        )
+    delta_times = np.diff(times)
+    steps = np.where(delta_times > 0, delta_times, 1)
+    accels = 2 * (np.diff(lengths) - speeds[:-1] * delta_times) / steps**2
+    # The integral of path length over time, up to each point
+    integrals = np.append(
+        0,
+        np.cumsum(
+            lengths[:-1] * delta_times
+            + speeds[:-1] * delta_times**2 / 2
+            + accels * delta_times**3 / 6
+        ),
+    )
+
+    def evaluate(time_values: NDArray[float64]) -> tuple[NDArray[float64], NDArray[float64]]:
+        """Return the path length, and the integral of path length, at each time."""
+        clipped = np.clip(time_values, times[0], times[-1])
+        i = np.clip(np.searchsorted(times, clipped, side="right") - 1, 0, len(accels) - 1)
+        tau = clipped - times[i]
+        return (
+            lengths[i] + speeds[i] * tau + accels[i] * tau**2 / 2,
+            integrals[i]
+            + lengths[i] * tau
+            + speeds[i] * tau**2 / 2
+            + accels[i] * tau**3 / 6
+            + lengths[0] * np.minimum(time_values - times[0], 0)
+            + lengths[-1] * np.maximum(time_values - times[-1], 0),
+        )
+
+    # The filtered profile reaches each point between its original time and one window
+    # later. Find the times together with Newton steps, bisecting whenever a step would
+    # leave that interval.
+    lower = times[1:-1].copy()
+    upper = lower + window
+    filtered_times = lower + window / 2
+    for _ in range(100 if len(filtered_times) > 0 else 0):
+        length_now, integral_now = evaluate(filtered_times)
+        length_then, integral_then = evaluate(filtered_times - window)
+        errors = (integral_now - integral_then) / window - lengths[1:-1]
+        lower = np.where(errors < 0, filtered_times, lower)
+        upper = np.where(errors < 0, upper, filtered_times)
+        newton_times = filtered_times - np.divide(
+            errors * window,
+            length_now - length_then,
+            out=np.full_like(errors, np.inf),
+            where=length_now > length_then,
+        )
+        next_times = np.where(
+            errors == 0,
+            filtered_times,
+            np.where(
+                (newton_times > lower) & (newton_times < upper),
+                newton_times,
+                (lower + upper) / 2,
+            ),
+        )
+        converged = np.all(np.abs(next_times - filtered_times) <= 1e-12 * window)
+        filtered_times = next_times
+        if converged:
+            break
+    length_now, _ = evaluate(filtered_times)
+    length_then, _ = evaluate(filtered_times - window)
+    return (
+        np.concatenate(([times[0]], filtered_times, [times[-1] + window])),
+        np.concatenate(([0], (length_now - length_then) / window, [0])),
+    )
+
+
+def _select_hermite_knots(  # pylint: disable=too-many-locals,too-many-arguments
+    times: NDArray[float64],
+    positions: NDArray[float64],
+    velocities: NDArray[float64],
+    tolerance: float,
+    *,
+    velocity_tolerance: float | None = None,
+    samples_per_segment: int = 0,
+    sample_positions: NDArray[float64] | None = None,
+    fixed_knots: ArrayLike = (),
+) -> NDArray[np.intp]:
+    """
+    Select a subset of points whose PVT segments pass within a tolerance of all the points.
+
+    Starting from the first and last points, each segment is split at the point
+    furthest from it, as in the Douglas-Peucker algorithm, until every point lies
+    within the tolerance of the cubic Hermite segment spanning it. All segments are
+    checked and split together on each pass.
+
+    :param times: The time of each point, in increasing order.
+    :param positions: The position of each point, with shape (n, dim).
+    :param velocities: The velocity of each point, with shape (n, dim).
+    :param tolerance: The maximum distance between a point and the segment spanning it.
+    :param velocity_tolerance: The maximum difference in velocity between a point and
+        the segment spanning it, or None to only check positions.
+    :param samples_per_segment: The number of evenly spaced times within each segment
+        between the original points at which to also check the tolerances.
+    :param sample_positions: The positions to meet at those times, with shape
+        ((n - 1) * samples_per_segment, dim) and the times of each segment in turn, or
+        None to follow the segments between the original points. The velocities to
+        meet are always those of the segments.
+    :param fixed_knots: The indices of points to always select, besides the first and last.
+    :return: The indices of the selected points, in increasing order.
+    """
+    # Gather the times to check, each with the index of the original segment it lies
+    # in and the point nearest to it
+    fractions = np.arange(1, samples_per_segment + 1) / (samples_per_segment + 1)
+    owners = np.concatenate(
+        (np.arange(len(times)), np.repeat(np.arange(len(times) - 1), samples_per_segment))
+    )
+    sample_times = times[:-1, np.newaxis] + np.diff(times)[:, np.newaxis] * fractions
+    c0, c1, c2, c3 = np.moveaxis(
+        np.repeat(_calculate_coefficients(times, positions, velocities), samples_per_segment, 0),
+        -1,
+        0,
+    )
+    delta_times = (sample_times.reshape(-1) - times[owners[len(times) :]])[:, np.newaxis]
+    check_times = np.concatenate((times, sample_times.reshape(-1)))
+    check_positions = np.concatenate(
+        (
+            positions,
+            (
+                c0 + delta_times * (c1 + delta_times * (c2 + delta_times * c3))
+                if sample_positions is None
+                else sample_positions
+            ),
+        )
+    )
+    check_velocities = np.concatenate(
+        (velocities, c1 + delta_times * (2 * c2 + 3 * c3 * delta_times))
+    )
+    nearest_points = owners + np.concatenate(
+        (np.zeros(len(times), dtype=int), np.tile(fractions >= 0.5, len(times) - 1))
+    )
+
+    knots = np.union1d([0, len(times) - 1], np.asarray(fixed_knots, dtype=np.intp))
+    while True:
+        coefficients = _calculate_coefficients(times[knots], positions[knots], velocities[knots])
+        segments = np.clip(np.searchsorted(knots, owners, side="right") - 1, 0, len(knots) - 2)
+        delta_times = (check_times - times[knots][segments])[:, np.newaxis]
+        c0, c1, c2, c3 = np.moveaxis(coefficients[segments], -1, 0)
+        errors = (
+            np.linalg.norm(
+                c0 + delta_times * (c1 + delta_times * (c2 + delta_times * c3)) - check_positions,
+                axis=1,
+            )
+            / tolerance
+        )
+        if velocity_tolerance is not None:
+            errors = np.maximum(
+                errors,
+                np.linalg.norm(
+                    c1 + delta_times * (2 * c2 + 3 * c3 * delta_times) - check_velocities, axis=1
+                )
+                / velocity_tolerance,
+            )
+        # Split each segment at the point nearest to where it is furthest out of tolerance
+        order = np.lexsort((errors, segments))
+        furthest = order[np.append(segments[order][1:] != segments[order][:-1], True)]
+        furthest = furthest[
+            (errors[furthest] > 1) & (knots[segments[furthest] + 1] - knots[segments[furthest]] > 1)
+        ]
+        if len(furthest) == 0:
+            return knots
+        knots = np.union1d(
+            knots,
+            np.clip(
+                nearest_points[furthest],
+                knots[segments[furthest]] + 1,
+                knots[segments[furthest] + 1] - 1,
+            ),
+        )
+
+
+def _select_path_knots(  # pylint: disable=too-many-locals,too-many-arguments
+    geo_path: GeometricPath,
+    times: NDArray[float64],
+    lengths: NDArray[float64],
+    speeds: NDArray[float64],
+    tolerance: float,
+    *,
+    fixed_knots: ArrayLike = (),
+    samples_per_segment: int = 3,
+    max_refinements: int = 20,
+) -> tuple[NDArray[float64], NDArray[float64], NDArray[float64]]:
+    """
+    Select points along a speed profile whose PVT segments pass within a tolerance of a path.
+
+    The tolerance is checked at the points of the speed profile, and against the path
+    at evenly spaced times between them, where the path length is found by following
+    the speed profile. Where even the segments between neighbouring points are out of
+    tolerance, a point is added halfway between them in time, and the points are
+    selected again, until the tolerance is met.
+
+    :param geo_path: The path being traversed.
+    :param times: The time of each point of the speed profile, in increasing order.
+    :param lengths: The path length of each point, in increasing order.
+    :param speeds: The speed along the path at each point.
+    :param tolerance: The maximum distance between the PVT segments and the path.
+    :param fixed_knots: The indices of points to always select, besides the first and last.
+    :param samples_per_segment: The number of evenly spaced times between neighbouring
+        points at which to check the tolerance.
+    :param max_refinements: The maximum number of times to add points.
+    :return: The times, positions, and velocities of the selected points.
+    """
+    fractions = np.arange(1, samples_per_segment + 1) / (samples_per_segment + 1)
+    fixed = np.zeros(len(times), dtype=bool)
+    fixed[np.asarray(fixed_knots, dtype=np.intp)] = True
+    derivatives = geo_path.calc_derivatives(geo_path.calc_u_at_lengths(lengths))
+    positions = derivatives[0]
+    velocities = speeds[:, np.newaxis] * _calculate_length_derivatives(*derivatives[1:3])[0]
+    for refinement in range(max_refinements + 1):
+        # The path length over time between the points, and at each check time
+        profile = _calculate_coefficients(times, lengths[:, np.newaxis], speeds[:, np.newaxis])
+        c0, c1, c2, c3 = np.moveaxis(profile[:, 0], -1, 0)[:, :, np.newaxis]
+        delta_times = np.diff(times)[:, np.newaxis] * fractions
+        check_positions = geo_path.calc_derivatives(
+            geo_path.calc_u_at_lengths(
+                (c0 + delta_times * (c1 + delta_times * (c2 + delta_times * c3))).reshape(-1)
+            )
+        )[0]
+        knots = _select_hermite_knots(
+            times,
+            positions,
+            velocities,
+            tolerance,
+            samples_per_segment=samples_per_segment,
+            sample_positions=check_positions,
+            fixed_knots=np.flatnonzero(fixed),
+        )
+
+        # Segments are split wherever there is a point to split them at, so only those
+        # between neighbouring points can still be out of tolerance
+        sequence = Sequence.from_arrays(times[knots], positions[knots], velocities[knots])
+        errors = np.linalg.norm(
+            sequence.sample((times[:-1, np.newaxis] + delta_times).reshape(-1))[0]
+            - check_positions,
+            axis=1,
+        ).reshape(delta_times.shape)
+        split = np.flatnonzero(np.max(errors, axis=1, initial=0) > tolerance)
+        if len(split) == 0 or refinement == max_refinements:
+            break
+
+        # Add a point halfway through each of them in time
+        half_times = np.diff(times)[split, np.newaxis] / 2
+        c0, c1, c2, c3 = c0[split], c1[split], c2[split], c3[split]
+        new_lengths = (c0 + half_times * (c1 + half_times * (c2 + half_times * c3)))[:, 0]
+        new_speeds = (c1 + half_times * (2 * c2 + 3 * c3 * half_times))[:, 0]
+        derivatives = geo_path.calc_derivatives(geo_path.calc_u_at_lengths(new_lengths))
+        new_velocities = (
+            new_speeds[:, np.newaxis] * _calculate_length_derivatives(*derivatives[1:3])[0]
+        )
+        times = np.insert(times, split + 1, times[split] + half_times[:, 0])
+        lengths = np.insert(lengths, split + 1, new_lengths)
+        speeds = np.insert(speeds, split + 1, new_speeds)
+        positions = np.insert(positions, split + 1, derivatives[0], axis=0)
+        velocities = np.insert(velocities, split + 1, new_velocities, axis=0)
+        fixed = np.insert(fixed, split + 1, False)
+    return times[knots], positions[knots], velocities[knots]
+
+
 def generate_velocities_continuous_acceleration(
     position_sequence: list[float],
     time_sequence: list[float],
@@ -391,47 +1330,163 @@ def generate_velocities_continuous_acceleration(
     3. acceleration is continuous at each segment transition
     4. velocity at the start and end of the sequence is as specified by the user
     """
-    num_segments = len(time_sequence) - 1
-    A = np.zeros((num_segments * 3, num_segments * 3))  # pylint: disable=invalid-name
-    b = np.zeros((num_segments * 3, 1))
-    # Initial boundary condition
-    A[0, 0] = 1
-    b[0] = vel_start
-    for segment_index in range(num_segments):
-        delta_time = time_sequence[segment_index + 1] - time_sequence[segment_index]
-        delta_pos = position_sequence[segment_index + 1] - position_sequence[segment_index]
-        # Position equation for segment
-        row_start = segment_index * 3 + 1
-        col_start = segment_index * 3
-        A[row_start, col_start : col_start + 3] = [delta_time, delta_time**2, delta_time**3]
-        b[row_start] = delta_pos
-        if segment_index < num_segments - 1:
-            # Middle segments, where velocity is unknown and accelerations are continuous
-            A[row_start + 1, col_start + 1 : col_start + 4] = [delta_time, 2 * delta_time**2, -1]
-            b[row_start + 1] = -delta_pos / delta_time
-            A[row_start + 2, col_start + 2 : col_start + 5] = [delta_time, 1 / delta_time, -1]
-            b[row_start + 2] = delta_pos / delta_time**2
-        else:
-            # Final segment
-            A[row_start + 1, col_start + 1 : col_start + 3] = [delta_time, 2 * delta_time**2]
-            b[row_start + 1] = vel_end - delta_pos / delta_time
-    # Get banded form of matrix
-    ab = np.array(
-        [
-            [0] + [A[i, i + 1] for i in range(num_segments * 3 - 1)],
-            [A[i, i] for i in range(num_segments * 3)],
-            [A[i + 1, i] for i in range(num_segments * 3 - 1)] + [0],
-        ]
+    delta_times = np.diff(np.asarray(time_sequence, dtype=float64))
+    delta_positions = np.diff(np.asarray(position_sequence, dtype=float64))
+    run_starts = np.zeros(len(delta_times), dtype=bool)
+    run_starts[0] = True
+    start_velocities = _solve_velocities_continuous_acceleration(
+        delta_times,
+        delta_positions[:, np.newaxis],
+        run_starts,
+        np.array([[vel_start]], dtype=float64),
+        np.array([[vel_end]], dtype=float64),
     )
-    coefficients = solve_banded((1, 1), ab, b)
     # Generate velocities
-    vel_sequence = [vel_start]
-    for segment_index in range(1, num_segments):
-        vel_sequence.append(float(coefficients[segment_index * 3]))
-    vel_sequence.append(vel_end)
+    vel_sequence: list[float] = [vel_start, *start_velocities[1:, 0].tolist(), vel_end]
     return vel_sequence
 
 
+def _solve_velocities_continuous_acceleration(  # pylint: disable=too-many-locals
+    delta_times: NDArray[float64],
+    delta_positions: NDArray[float64],
+    run_starts: NDArray[np.bool_],
+    vel_starts: NDArray[float64],
+    vel_ends: NDArray[float64],
+) -> NDArray[float64]:
+    """
+    Solve for the start velocity of each segment in one or more runs of segments.
+
+    Each run of consecutive segments is an independent continuous acceleration
+    problem, as described in generate_velocities_continuous_acceleration(). The
+    runs are packed into a single block-diagonal banded system, so that all of
+    them are solved with one call to solve_banded(). Each column of
+    delta_positions, vel_starts and vel_ends is a separate right-hand side
+    (e.g., one per axis) that shares the same system matrix.
+
+    :param delta_times: The duration of each segment, with shape (m,).
+    :param delta_positions: The position change over each segment, with shape (m, k).
+    :param run_starts: Whether each segment is the first in its run, with shape (m,).
+        The first segment must always start a run.
+    :param vel_starts: The initial velocity of each run, with shape (number of runs, k).
+    :param vel_ends: The final velocity of each run, with shape (number of runs, k).
+    :return: The velocity at the start of each segment, with shape (m, k).
+    """
+    num_segments, num_columns = delta_positions.shape
+    run_ends = np.append(run_starts[1:], True)
+    previous_delta_times = np.roll(delta_times, 1)
+    previous_delta_positions = np.roll(delta_positions, 1, axis=0)
+    # Build the three diagonals of A and the array b directly, grouped into blocks of
+    # three rows per segment. For segment i, the rows are:
+    # - acceleration continuity with segment i - 1 (or the initial velocity, if i
+    #   starts a run),
+    # - the position equation, and
+    # - velocity continuity with segment i + 1 (or the final velocity, if i ends a run).
+    # Rows at the boundaries between runs have no entries outside their own block.
+    sub_diagonal = np.empty((num_segments, 3))
+    diagonal = np.empty((num_segments, 3))
+    super_diagonal = np.empty((num_segments, 3))
+    b = np.empty((num_segments, 3, num_columns))
+    # Acceleration continuity at each segment transition, and the initial boundary condition
+    sub_diagonal[:, 0] = np.where(run_starts, 0, previous_delta_times)
+    diagonal[:, 0] = np.where(run_starts, 1, 1 / previous_delta_times)
+    super_diagonal[:, 0] = np.where(run_starts, 0, -1)
+    b[:, 0] = previous_delta_positions / previous_delta_times[:, np.newaxis] ** 2
+    b[run_starts, 0] = vel_starts
+    # Position equation for each segment
+    sub_diagonal[:, 1] = delta_times
+    diagonal[:, 1] = delta_times**2
+    super_diagonal[:, 1] = delta_times**3
+    b[:, 1] = delta_positions
+    # Velocity continuity at each segment transition, and the final boundary condition
+    sub_diagonal[:, 2] = delta_times
+    diagonal[:, 2] = 2 * delta_times**2
+    super_diagonal[:, 2] = np.where(run_ends, 0, -1)
+    b[:, 2] = -delta_positions / delta_times[:, np.newaxis]
+    b[run_ends, 2] += vel_ends
+    # Get banded form of matrix
+    ab = np.zeros((3, num_segments * 3))
+    ab[0, 1:] = super_diagonal.flat[:-1]
+    ab[1] = diagonal.flat
+    ab[2, :-1] = sub_diagonal.flat[1:]
+    coefficients = solve_banded((1, 1), ab, b.reshape(num_segments * 3, num_columns))
+    start_velocities: NDArray[float64] = coefficients[::3]
+    return start_velocities
+
+
+def _fill_velocity_gaps_continuous_acceleration(
+    velocities: NDArray[float64],
+    delta_times: NDArray[float64],
+    delta_positions: NDArray[float64],
+) -> None:
+    """
+    Generate undefined velocities such that acceleration is continuous at each transition.
+
+    The gaps of undefined (NaN) velocities in every axis are generated together
+    by a single call to _solve_velocities_continuous_acceleration().
+
+    :param velocities: The velocities of each axis, with shape (dim, n). NaN values
+        are replaced in place. The first and last velocity of each axis must be defined.
+    :param delta_times: The duration of each segment, with shape (n - 1,).
+    :param delta_positions: The position change of each axis over each segment, with
+        shape (dim, n - 1).
+    """
+    # Find each gap of undefined velocities in each axis. Each gap is
+    # generated from the run of segments spanning from the last defined
+    # velocity before it to the first defined velocity after it.
+    undefined = np.isnan(velocities).astype(np.int8)
+    gap_edges = np.diff(undefined, axis=1)
+    gap_axes, gap_starts = np.nonzero(gap_edges == 1)
+    gap_ends = np.nonzero(gap_edges == -1)[1] + 1
+    if len(gap_starts) == 0:
+        return
+    # Pack the runs of segments for all gaps into one system
+    run_lengths = gap_ends - gap_starts
+    run_offsets = np.cumsum(run_lengths) - run_lengths
+    run_starts = np.zeros(run_lengths.sum(), dtype=bool)
+    run_starts[run_offsets] = True
+    segment_axes = np.repeat(gap_axes, run_lengths)
+    segment_indices = np.repeat(gap_starts - run_offsets, run_lengths) + np.arange(len(run_starts))
+    start_velocities = _solve_velocities_continuous_acceleration(
+        delta_times[segment_indices],
+        delta_positions[segment_axes, segment_indices][:, np.newaxis],
+        run_starts,
+        velocities[gap_axes, gap_starts][:, np.newaxis],
+        velocities[gap_axes, gap_ends][:, np.newaxis],
+    )
+    generated = ~run_starts
+    velocities[segment_axes[generated], segment_indices[generated]] = start_velocities[generated, 0]
+
+
+def _fill_velocity_gaps_finite_difference(
+    velocities: NDArray[float64],
+    delta_times: NDArray[float64],
+    delta_positions: NDArray[float64],
+) -> None:
+    """
+    Generate undefined velocities by finite difference.
+
+    Each undefined (NaN) velocity is the average of the slopes of the segments
+    before and after its point, as in interpolate_velocity_finite_difference(),
+    ignoring segments with zero duration. The velocities depend only on the
+    neighbouring points, so they are all calculated at once without a solve.
+
+    :param velocities: The velocities of each axis, with shape (dim, n). NaN values
+        are replaced in place. The first and last velocity of each axis must be defined.
+    :param delta_times: The duration of each segment, with shape (n - 1,).
+    :param delta_positions: The position change of each axis over each segment, with
+        shape (dim, n - 1).
+    """
+    moving = delta_times > 0
+    slopes = np.divide(
+        delta_positions, delta_times, out=np.zeros_like(delta_positions), where=moving
+    )
+    num_slopes = moving[:-1].astype(float64) + moving[1:]
+    assert np.all(num_slopes > 0), "All three points must not have the same time"
+    interior = velocities[:, 1:-1]
+    undefined = np.isnan(interior)
+    interior[undefined] = ((slopes[:, :-1] + slopes[:, 1:]) / num_slopes)[undefined]
+
+
 def generate_positions_continuous_acceleration(
     velocity_sequence: list[float],
     time_sequence: list[float],
@@ -457,48 +1512,44 @@ def generate_positions_continuous_acceleration(
     2. acceleration is continuous at each segment transition
     3. acceleration at the start of the sequence is zero
     """
-
-    def calculate_delta_position(c1: float, c2: float, c3: float, delta_time: float) -> float:
-        """Calculate the position delta of a segment from its coefficients."""
-        return float(c1 * delta_time + c2 * delta_time**2 + c3 * delta_time**3)
-
-    num_segments = len(time_sequence) - 1
-    A = np.zeros((num_segments * 2, num_segments * 2))  # pylint: disable=invalid-name
-    b = np.zeros((num_segments * 2, 1))
+    velocities = np.asarray(velocity_sequence, dtype=float64)
+    delta_times = np.diff(np.asarray(time_sequence, dtype=float64))
+    delta_velocities = np.diff(velocities)
+    num_segments = len(delta_times)
+    # Build the two diagonals of A and the array b directly, grouped into blocks of
+    # two rows per segment. For segment i, the rows are:
+    # - acceleration continuity with segment i - 1 (or the initial acceleration, if i = 0), and
+    # - the velocity equation.
+    sub_diagonal = np.empty((num_segments, 2))
+    diagonal = np.empty((num_segments, 2))
+    b = np.empty((num_segments, 2))
     # Initial condition acceleration 0 is zero
-    A[0, 0] = 1
-    for segment_index in range(num_segments):
-        delta_time = time_sequence[segment_index + 1] - time_sequence[segment_index]
-        delta_vel = velocity_sequence[segment_index + 1] - velocity_sequence[segment_index]
-        # Position equation for segment
-        block_index = segment_index * 2
-        A[block_index + 1, block_index : block_index + 2] = [2 * delta_time, 3 * delta_time**2]
-        b[block_index + 1] = delta_vel
-        if segment_index < num_segments - 1:
-            # Middle segments, where accelerations are continuous
-            A[block_index + 2, block_index + 1 : block_index + 3] = [3 * delta_time / 2, -1]
-            b[block_index + 2] = -delta_vel / (2 * delta_time)
+    sub_diagonal[0, 0] = b[0, 0] = 0
+    diagonal[0, 0] = 1
+    # Middle segments, where accelerations are continuous
+    sub_diagonal[1:, 0] = 3 * delta_times[:-1] / 2
+    diagonal[1:, 0] = -1
+    b[1:, 0] = -delta_velocities[:-1] / (2 * delta_times[:-1])
+    # Velocity equation for each segment
+    sub_diagonal[:, 1] = 2 * delta_times
+    diagonal[:, 1] = 3 * delta_times**2
+    b[:, 1] = delta_velocities
     # Get banded form of matrix
-    ab = np.array(
-        [
-            [A[i, i] for i in range(num_segments * 2)],
-            [A[i + 1, i] for i in range(num_segments * 2 - 1)] + [0],
-        ]
-    )
-    coefficients = solve_banded((1, 0), ab, b)
+    ab = np.zeros((2, num_segments * 2))
+    ab[0] = diagonal.flat
+    ab[1, :-1] = sub_diagonal.flat[1:]
+    coefficients = solve_banded((1, 0), ab, b.reshape(-1)).reshape(num_segments, 2)
     # Generate positions
-    pos_sequence = [pos_start]
-    for segment_index in range(num_segments):
-        pos_sequence.append(
-            pos_sequence[-1]
-            + calculate_delta_position(
-                velocity_sequence[segment_index],
-                coefficients[segment_index * 2],
-                coefficients[segment_index * 2 + 1],
-                time_sequence[segment_index + 1] - time_sequence[segment_index],
-            )
-        )
-    pos_sequence.append(pos_end)
+    delta_positions = (
+        velocities[:-1] * delta_times
+        + coefficients[:, 0] * delta_times**2
+        + coefficients[:, 1] * delta_times**3
+    )
+    pos_sequence: list[float] = [
+        pos_start,
+        *(pos_start + np.cumsum(delta_positions)).tolist(),
+        pos_end,
+    ]
     return pos_sequence
 
 
@@ -541,8 +1592,151 @@ def interpolate_velocity_finite_difference(
     return sum_differences / num_differences
 
 
+class StreamingVelocityGenerator:
+    """
+    Generate velocities for a stream of position-time points as they arrive.
+
+    The velocities are generated such that acceleration is continuous at each
+    transition, as in generate_velocities_continuous_acceleration(), but the
+    system is only solved over a sliding look-ahead window of the most recent
+    points. Once a window's worth of points has arrived after a point, its
+    velocity is final and it is emitted, so the latency and memory use are
+    bounded by the window length, no matter how long the stream runs.
+
+    The velocity at the end of each window is estimated by finite difference,
+    and the effect of this estimate on the emitted velocity shrinks quickly as
+    the window grows. A longer window gives velocities closer to those of
+    solving the whole sequence at once, at the cost of more latency.
+    """
+
+    DEFAULT_WINDOW = 16
+    """The default number of segments in the look-ahead window."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW, vel_start: ArrayLike | None = None):
+        """
+        Initialize the generator.
+
+        :param window: The number of segments to look ahead of each emitted point.
+        :param vel_start: The velocity of the first point. Defaults to zero in every axis.
+        """
+        assert window >= 1, "The window must contain at least one segment."
+        self._window = window
+        self._vel_start = None if vel_start is None else np.array(vel_start, dtype=float64)
+        self._last_point: Point | None = None
+        self._times: deque[float] = deque()
+        self._positions: deque[NDArray[float64]] = deque()
+
+    @property
+    def window(self) -> int:
+        """The number of segments to look ahead of each emitted point."""
+        return self._window
+
+    @property
+    def pending_count(self) -> int:
+        """The number of points received whose velocities are not final yet."""
+        return len(self._times)
+
+    def push(self, time: float, position: ArrayLike) -> list[Point]:
+        """
+        Add the next point of the stream.
+
+        :param time: The time of the point, which must be after the previous point.
+        :param position: The position of the point.
+        :return: The points whose velocities became final, in order.
+        """
+        position_array = np.array(position, dtype=float64).reshape(-1)
+        if self._last_point is None:
+            # The velocity of the first point is given, so it is final right away
+            velocity = np.zeros_like(position_array) if self._vel_start is None else self._vel_start
+            assert velocity.shape == position_array.shape, "Velocity must match the position."
+            self._last_point = Point(tuple(position_array.tolist()), tuple(velocity.tolist()), time)
+            return [self._last_point]
+        assert position_array.shape == (self._last_point.dim,), "Dimensions must match."
+        previous_time = self._times[-1] if self._times else self._last_point.time
+        assert time > previous_time, "Times must be strictly increasing."
+        self._times.append(time)
+        self._positions.append(position_array)
+        if len(self._times) <= self._window:
+            return []
+        # Estimate the velocity at the end of the window from its neighbours
+        times, positions = self._pending_arrays()
+        slopes = np.diff(positions[-3:], axis=0) / np.diff(times[-3:])[:, np.newaxis]
+        velocities = self._solve(times[:-1], positions[:-1], slopes.mean(axis=0))
+        return [self._emit_next(velocities[1])]
+
+    def finish(self, vel_end: ArrayLike | None = None) -> list[Point]:
+        """
+        End the stream, and emit all remaining points.
+
+        The generator can then be used for a new stream.
+
+        :param vel_end: The velocity of the last point. Defaults to zero in every axis.
+        :return: The remaining points, in order.
+        """
+        if self._last_point is None:
+            return []
+        points = []
+        if self._times:
+            times, positions = self._pending_arrays()
+            if vel_end is None:
+                final_velocity = np.zeros(positions.shape[1])
+            else:
+                final_velocity = np.array(vel_end, dtype=float64)
+            velocities = self._solve(times, positions, final_velocity)
+            points = [self._emit_next(velocity) for velocity in velocities[1:]]
+        self._last_point = None
+        return points
+
+    def _pending_arrays(self) -> tuple[NDArray[float64], NDArray[float64]]:
+        """Return the times and positions of the last emitted point and every pending point."""
+        assert self._last_point is not None
+        times = np.array([self._last_point.time, *self._times])
+        positions = np.array([self._last_point.position, *self._positions])
+        return times, positions
+
+    def _solve(
+        self, times: NDArray[float64], positions: NDArray[float64], vel_end: NDArray[float64]
+    ) -> NDArray[float64]:
+        """
+        Solve for the velocities at the given points, starting from the last emitted point.
+
+        :param times: The times of the points, with shape (n,).
+        :param positions: The positions of the points, with shape (n, dim).
+        :param vel_end: The velocity at the last point, with shape (dim,).
+        :return: The velocities at the points, with shape (n, dim).
+        """
+        assert self._last_point is not None
+        delta_times = np.diff(times)
+        run_starts = np.zeros(len(delta_times), dtype=bool)
+        run_starts[0] = True
+        velocities: NDArray[float64] = _solve_velocities_continuous_acceleration(
+            delta_times,
+            np.diff(positions, axis=0),
+            run_starts,
+            np.array([self._last_point.velocity]),
+            vel_end.reshape(1, -1),
+        )
+        return np.concatenate([velocities, vel_end.reshape(1, -1)])
+
+    def _emit_next(self, velocity: NDArray[float64]) -> Point:
+        """Finalize the oldest pending point with the given velocity."""
+        position = self._positions.popleft()
+        self._last_point = Point(
+            tuple(position.tolist()), tuple(velocity.tolist()), self._times.popleft()
+        )
+        return self._last_point
+
+
 class CSVData:
-    """A helper class to read sequences from CSV files."""
+    """
+    A helper class to read sequences from CSV files.
+
+    The rows are parsed in blocks straight into float64 columns, with NaN
+    for any value that is left empty.
+    """
+
+    CHUNK_SIZE = 65536
+    """The number of rows parsed at a time."""
 
     _time_index: int | None
     """The index of the time column."""
@@ -550,63 +1744,70 @@ class CSVData:
     """The indices of the position columns."""
     _velocity_indices: list[int]
     """The indices of the position columns."""
-    _time_sequence: list[float]
-    """The sequence of time values read from the file."""
-    _position_sequences: list[list[float]]
-    """An array of position sequences, one for each dimension"""
-    _velocity_sequences: list[list[float | None]]
-    """An array of velocity sequences, one for each dimension."""
-
-    @property
+    _times: NDArray[float64]
+    """The time values read from the file."""
+    _positions: NDArray[float64]
+    """The position values read from the file, with one column for each dimension."""
+    _velocities: NDArray[float64]
+    """The velocity values read from the file, with one column for each dimension."""
+
+    @cached_property
     def contains_time_data(self) -> bool:
         """Return whether the data contains time values."""
-        return self._time_index is not None and any(t is not None for t in self._time_sequence)
+        return self._time_index is not None and bool(np.any(~np.isnan(self._times)))
 
-    @property
+    @cached_property
     def contains_position_data(self) -> bool:
         """Return whether the data contains position values."""
-        if len(self._position_indices) > 0:
-            for sequence in self._position_sequences:
-                if any(p is not None for p in sequence):
-                    return True
-        return False
+        return bool(np.any(~np.isnan(self._positions)))
 
-    @property
+    @cached_property
     def contains_velocity_data(self) -> bool:
         """Return whether the data contains velocity values."""
-        if len(self._velocity_indices) > 0:
-            for sequence in self._velocity_sequences:
-                if any(v is not None for v in sequence):
-                    return True
-        return False
+        return bool(np.any(~np.isnan(self._velocities)))
 
-    @property
+    @cached_property
     def contains_complete_velocity_data(self) -> bool:
         """Return whether or not all velocity values are specified."""
-        if len(self._velocity_indices) == 0:
-            return False
-        for sequence in self._velocity_sequences:
-            if any(v is None for v in sequence):
-                return False
-        return True
+        return len(self._velocity_indices) > 0 and not np.any(np.isnan(self._velocities))
+
+    @property
+    def times(self) -> NDArray[float64]:
+        """Return a read-only array of the time data, if it exists."""
+        assert self.contains_time_data, "No time data was read from the file"
+        return _read_only(self._times)
+
+    @property
+    def positions(self) -> NDArray[float64]:
+        """Return a read-only array of the position data, if it exists, one column per axis."""
+        assert self.contains_position_data, "No position data was read from the file"
+        return _read_only(self._positions)
+
+    @property
+    def velocities(self) -> NDArray[float64]:
+        """Return a read-only array of the velocity data, if it exists, one column per axis."""
+        assert self.contains_velocity_data, "No velocity data was read from the file"
+        return _read_only(self._velocities)
 
     @property
     def time_sequence(self) -> list[float]:
         """Return the time data, if it exists."""
-        assert self.contains_time_data, "No time data was read from the file"
-        return self._time_sequence
+        time_sequence: list[float] = self.times.tolist()
+        return time_sequence
 
     @property
     def position_sequences(self) -> list[list[float]]:
         """Return the position data, if it exists."""
-        assert self.contains_position_data, "No position data was read from the file"
-        return self._position_sequences
+        position_sequences: list[list[float]] = self.positions.T.tolist()
+        return position_sequences
 
     @property
     def velocity_sequences(self) -> list[list[float | None]]:
         """Return the velocity data, if it exists."""
-        assert self.contains_velocity_data, "No velocity data was read from the file"
-        return self._velocity_sequences
+        return [
+            [None if math.isnan(value) else value for value in sequence]
+            for sequence in self.velocities.T.tolist()
+        ]
 
     def __init__(self, filename: str) -> None:
         """
@@ -615,10 +1816,34 @@ class CSVData:
         :param filename: The name of the CSV file.
         """
         with open(filename, "r", encoding="utf-8") as file:
-            reader = csv.reader(file)
-            self._read_header(next(reader))
-            for row in reader:
-                self._read_row(row)
+            header = next(csv.reader([file.readline()]), [])
+            self._read_header(header)
+            self._read_block(
+                np.concatenate(
+                    [np.empty((0, len(header))), *self._read_blocks(file, self.CHUNK_SIZE)]
+                )
+            )
+
+    @classmethod
+    def iter_chunks(cls, filename: str, chunk_size: int = CHUNK_SIZE) -> Iterator[CSVData]:
+        """
+        Read a CSV file one chunk of rows at a time.
+
+        Each chunk is returned as its own CSVData instance, whose data and
+        properties describe only the rows of that chunk, so that files too
+        large to hold in memory can be processed piece by piece.
+
+        :param filename: The name of the CSV file.
+        :param chunk_size: The number of lines of the file read into each chunk. Blank
+            lines are skipped, so a chunk may have fewer rows than this.
+        """
+        with open(filename, "r", encoding="utf-8") as file:
+            header = next(csv.reader([file.readline()]), [])
+            for block in cls._read_blocks(file, chunk_size):
+                chunk = cls.__new__(cls)
+                chunk._read_header(header)
+                chunk._read_block(block)
+                yield chunk
 
     def _read_header(self, header: list[str]) -> None:
         """Read the header row."""
@@ -633,28 +1858,88 @@ class CSVData:
         self._velocity_indices = [
             i for i, col_name in enumerate(header) if "vel" in col_name.lower()
         ]
-        # Setup sequence arrays
-        self._time_sequence = []
-        self._position_sequences = [[] for _ in self._position_indices]
-        self._velocity_sequences = [[] for _ in self._velocity_indices]
-
-    def _read_row(self, row: list[str]) -> None:
-        """Read a data row."""
-        # Read time.
-        if self._time_index is not None:
-            self._time_sequence.append(float(row[self._time_index]))
-        # Read position.
-        for dim_index, pos_column_index in enumerate(self._position_indices):
-            self._position_sequences[dim_index].append(float(row[pos_column_index]))
-        # Read velocity. This must support None values.
-        for dim_index, vel_column_index in enumerate(self._velocity_indices):
-            val = row[vel_column_index]
-            self._velocity_sequences[dim_index].append(float(val) if val != "" else None)
-
-
-class Sequence:
+
+    @staticmethod
+    def _read_blocks(file: TextIO, chunk_size: int) -> Iterator[NDArray[float64]]:
+        """Parse the data rows of a file into blocks of float64 values, one column per field."""
+        while lines := list(islice(file, chunk_size)):
+            lines = [line for line in lines if not line.isspace()]
+            if any('"' in line for line in lines):
+                # Quoted fields need a CSV-aware parse, reading empty fields as NaN
+                rows = [
+                    [value if value.strip() else "nan" for value in row]
+                    for row in csv.reader(lines)
+                ]
+                if rows:
+                    yield np.array(rows, dtype=float64)
+                continue
+            # Skip blank lines, and read empty fields as NaN
+            text = "\n" + "".join(lines) + "\n"
+            if ",," in text or "\n," in text or ",\n" in text:
+                text = (
+                    text.replace(",,", ",nan,")
+                    .replace(",,", ",nan,")
+                    .replace("\n,", "\nnan,")
+                    .replace(",\n", ",nan\n")
+                )
+            block = np.loadtxt(StringIO(text), delimiter=",", dtype=float64, ndmin=2)
+            if len(block) > 0:
+                yield block
+
+    def _read_block(self, block: NDArray[float64]) -> None:
+        """Read a block of data rows."""
+        self._times = block[:, self._time_index] if self._time_index is not None else np.empty(0)
+        self._positions = block[:, self._position_indices]
+        self._velocities = block[:, self._velocity_indices]
+
+
+@dataclass(frozen=True)
+class LimitViolation:
+    """A segment of a PVT sequence that exceeds a limit on one axis."""
+
+    segment: int
+    """The index of the segment."""
+    axis: int
+    """The index of the axis."""
+    quantity: LimitQuantity
+    """The quantity that exceeds its limit."""
+    time: float
+    """The absolute time at which the quantity is furthest from zero within the segment."""
+    value: float
+    """The value of the quantity at that time."""
+    limit: float
+    """The limit on the magnitude of the quantity."""
+
+
+class Sequence:  # pylint: disable=too-many-public-methods
     """A PVT sequence, formed from one or more PVT points."""
 
+    BINARY_MAGIC = b"PVTSEQ"
+    """The bytes at the start of every binary PVT sequence file."""
+    BINARY_VERSION = 1
+    """The version of the binary PVT sequence file format."""
+    BINARY_HEADER = np.dtype([("magic", "S6"), ("version", "<u2"), ("dim", "<u8"), ("size", "<u8")])
+    """
+    The layout of the header of binary PVT sequence files.
+
+    The header is followed by contiguous little-endian float64 blocks of the
+    times, positions, and velocities of the points, with the positions and
+    velocities each stored one point after another.
+    """
+    SETPOINT_CHUNK_SIZE = 4096
+    """The default number of setpoints in each chunk yielded by iter_setpoints()."""
+    LIMIT_TOLERANCE = 1e-9
+    """The relative amount by which values may exceed their limits in check_limits()."""
+    MAX_SLOWDOWN_ITERATIONS = 100
+    """The maximum number of times the segments that exceed their limits are slowed down."""
+    SLOWDOWN_TAPER = 0.1
+    """
+    How quickly the slowdown of segments that exceed their limits tapers off over time,
+    relative to the smallest ratio of an axis' maximum acceleration to its maximum speed.
+    """
+    UPDATE_NEIGHBORHOOD = 20
+    """The default number of points on each side of an updated point to regenerate."""
+
     def __init__(self, points: list[Point] | None = None) -> None:
         """
         Initialize the PVT sequence.
@@ -663,32 +1948,71 @@ class Sequence:
         """
         if points is None:
             points = []
-        self._points: list[Point] = []
-        self._segments: list[Segment] = []
+        # The sequence is stored as contiguous arrays with spare capacity for
+        # appending points. Only the first _size rows (or _size - 1 rows, for
+        # segment coefficients) hold valid data.
+        self._size = 0
+        self._time: NDArray[float64] = np.empty(0)
+        self._position: NDArray[float64] = np.empty((0, 0))
+        self._velocity: NDArray[float64] = np.empty((0, 0))
+        self._coefficients: NDArray[float64] = np.empty((0, 0, 4))
+        self._segment_cursor = 0
         for point in points:
             self.append_point(point)
 
     @property
     def dim(self) -> int:
         """Get the dimension of the sequence."""
-        return self.points[0].dim
+        assert self._size > 0, "There are no points in the sequence."
+        return int(self._position.shape[1])
 
     @property
     def points(self) -> list[Point]:
-        """Get a copy of the points in the sequence."""
-        return self._points.copy()
+        """Get a list of the points in the sequence, created from the underlying arrays."""
+        return [
+            Point(tuple(position), tuple(velocity), time)
+            for time, position, velocity in zip(
+                self.times.tolist(), self.positions.tolist(), self.velocities.tolist()
+            )
+        ]
+
+    @property
+    def segments(self) -> list[Segment]:
+        """Get a list of the segments in the sequence, created from the underlying arrays."""
+        points = self.points
+        return [Segment(start, end) for start, end in zip(points[:-1], points[1:])]
+
+    @property
+    def times(self) -> NDArray[float64]:
+        """Get a read-only array of the point times, with shape (n,)."""
+        return _read_only(self._time[: self._size])
+
+    @property
+    def positions(self) -> NDArray[float64]:
+        """Get a read-only array of the point positions, with shape (n, dim)."""
+        return _read_only(self._position[: self._size])
+
+    @property
+    def velocities(self) -> NDArray[float64]:
+        """Get a read-only array of the point velocities, with shape (n, dim)."""
+        return _read_only(self._velocity[: self._size])
+
+    @property
+    def coefficients(self) -> NDArray[float64]:
+        """Get a read-only array of the segment coefficients, with shape (n - 1, dim, 4)."""
+        return _read_only(self._coefficients[: max(self._size - 1, 0)])
 
     @property
     def start_time(self) -> float:
         """Get the start time of the sequence."""
-        assert len(self._points) > 0, "There are no points in the sequence."
-        return self._points[0].time
+        assert self._size > 0, "There are no points in the sequence."
+        return float(self._time[0])
 
     @property
     def end_time(self) -> float:
         """Get the end time of the sequence."""
-        assert len(self._points) > 0, "There are no points in the sequence."
-        return self._points[-1].time
+        assert self._size > 0, "There are no points in the sequence."
+        return float(self._time[self._size - 1])
 
     def append_point(self, point: Point) -> None:
         """
@@ -696,10 +2020,96 @@ class Sequence:
 
         :param point: The PVT point to append.
         """
-        if len(self._points) > 0:
-            # Try to append the segment first to ensure it passes validation
-            self._segments.append(Segment(self._points[-1], point))
-        self._points.append(point)
+        index = self._size
+        if index == 0:
+            self._reserve(16, point.dim)
+        else:
+            # Calculate the segment coefficients first to ensure the point passes validation
+            assert point.dim == self.dim, "Points must have the same number of dimensions."
+            delta_time = point.time - float(self._time[index - 1])
+            assert delta_time >= 0, "The time at point 2 must be greater than the time at point 1"
+            coefficients = _calculate_segment_coefficients(
+                delta_time,
+                self._position[index - 1].tolist(),
+                point.position,
+                self._velocity[index - 1].tolist(),
+                point.velocity,
+            )
+            if index == len(self._time):
+                self._reserve(2 * index, point.dim)
+            self._coefficients[index - 1] = coefficients
+        self._time[index] = point.time
+        self._position[index] = point.position
+        self._velocity[index] = point.velocity
+        self._size += 1
+
+    def update_point(
+        self,
+        index: int,
+        *,
+        position: tuple[float, ...] | None = None,
+        velocity: tuple[float, ...] | None = None,
+        time: float | None = None,
+        neighborhood: int = UPDATE_NEIGHBORHOOD,
+    ) -> None:
+        """
+        Change a point of the sequence, regenerating only the trajectory around it.
+
+        The velocities of the points within the neighborhood of the changed point
+        are regenerated such that acceleration is continuous at each transition, as
+        in generate_velocities(), while the velocities at the edges of the
+        neighborhood stay fixed. The effect of a change on the velocities in a
+        continuous acceleration sequence decays quickly with distance, so a small
+        neighborhood closely matches regenerating the whole sequence, and only the
+        coefficients of the segments within the neighborhood are recalculated.
+
+        :param index: The index of the point to change.
+        :param position: The new position of the point, or None to keep it.
+        :param velocity: The new velocity of the point, or None to regenerate it.
+        :param time: The new time of the point, or None to keep it.
+        :param neighborhood: The number of points on each side of the changed point
+            whose velocities are regenerated.
+        """
+        size = self._size
+        if index < 0:
+            index += size
+        assert 0 <= index < size, f"Point index {index} is out of range."
+        assert neighborhood >= 0, "The neighborhood must not be negative."
+        if time is not None:
+            assert (index == 0 or self._time[index - 1] <= time) and (
+                index == size - 1 or time <= self._time[index + 1]
+            ), "The time must be between the times of the neighbouring points."
+        if not self._time.flags.writeable:
+            # The points are shared with a file or the arrays they were created
+            # from, so take a copy before changing them
+            self._reserve(size, self.dim)
+        if position is not None:
+            assert len(position) == self.dim, "Points must have the same number of dimensions."
+            self._position[index] = position
+        if time is not None:
+            self._time[index] = time
+        start = max(index - neighborhood, 0)
+        end = min(index + neighborhood, size - 1) + 1
+        times = self._time[start:end]
+        positions = self._position[start:end]
+        velocities = self._velocity[start:end]
+        # Mark the velocities to regenerate as undefined, and fill them in
+        generated_velocities = velocities.T.copy()
+        generated_velocities[:, 1:-1] = np.nan
+        if velocity is not None:
+            assert len(velocity) == self.dim, "Position must have the same dimension as velocity."
+            generated_velocities[:, index - start] = velocity
+        _fill_velocity_gaps_continuous_acceleration(
+            generated_velocities, np.diff(times), np.diff(positions, axis=0).T
+        )
+        velocities[:] = generated_velocities.T
+        # Recalculate the segments in the neighborhood, and always the segments on
+        # either side of the changed point, even if the neighborhood is empty
+        start = min(start, max(index - 1, 0))
+        end = max(end, min(index + 2, size))
+        self._coefficients[start : end - 1] = _calculate_coefficients(
+            self._time[start:end], self._position[start:end], self._velocity[start:end]
+        )
 
     def position(self, time: float) -> tuple[float, ...]:
         """
@@ -707,8 +2117,12 @@ class Sequence:
 
         :param time: The time at which to calculate the position.
         """
-        segment = self._get_segment_at_time(time)
-        return segment.position(time)
+        index = self._get_segment_index_at_time(time)
+        delta_time = time - float(self._time[index])
+        return tuple(
+            c0 + delta_time * (c1 + delta_time * (c2 + delta_time * c3))
+            for c0, c1, c2, c3 in self._coefficients[index].tolist()
+        )
 
     def velocity(self, time: float) -> tuple[float, ...]:
         """
@@ -716,8 +2130,12 @@ class Sequence:
 
         :param time: The time at which to calculate the velocity.
         """
-        segment = self._get_segment_at_time(time)
-        return segment.velocity(time)
+        index = self._get_segment_index_at_time(time)
+        delta_time = time - float(self._time[index])
+        return tuple(
+            c1 + delta_time * (2 * c2 + 3 * c3 * delta_time)
+            for _, c1, c2, c3 in self._coefficients[index].tolist()
+        )
 
     def acceleration(self, time: float) -> tuple[float, ...]:
         """
@@ -725,8 +2143,176 @@ class Sequence:
 
         :param time: The time at which to calculate the acceleration.
         """
-        segment = self._get_segment_at_time(time)
-        return segment.acceleration(time)
+        index = self._get_segment_index_at_time(time)
+        delta_time = time - float(self._time[index])
+        return tuple(
+            2 * c2 + 6 * c3 * delta_time for _, _, c2, c3 in self._coefficients[index].tolist()
+        )
+
+    def sample(
+        self, times: ArrayLike
+    ) -> tuple[NDArray[float64], NDArray[float64], NDArray[float64]]:
+        """
+        Calculate the position, velocity, and acceleration at an array of times.
+
+        This is equivalent to calling position(), velocity(), and acceleration()
+        at each time, but evaluates all of the segment polynomials in a single
+        vectorized pass, which is much faster when sampling many times.
+
+        :param times: The times at which to sample the sequence.
+        :return: The position, velocity, and acceleration arrays, each with
+            shape (number of times, dim).
+        """
+        sample_times = np.asarray(times, dtype=float64).reshape(-1)
+        assert self._size > 1, "There are no segments in the sequence"
+        point_times = self.times
+        assert len(sample_times) == 0 or (
+            point_times[0] <= sample_times.min() and sample_times.max() <= point_times[-1] + 1e-14
+        ), f"Times are outside of sequence range ({point_times[0]}, {point_times[-1]})"
+        # Index of the last point whose time is less than or equal to each time,
+        # using the last segment for times at the end of the sequence
+        indices = np.clip(
+            np.searchsorted(point_times, sample_times, side="right") - 1, 0, self._size - 2
+        )
+        delta_times = (sample_times - point_times[indices])[:, np.newaxis]
+        c0, c1, c2, c3 = np.moveaxis(self._coefficients[indices], -1, 0)
+        positions = c0 + delta_times * (c1 + delta_times * (c2 + delta_times * c3))
+        velocities = c1 + delta_times * (2 * c2 + 3 * c3 * delta_times)
+        accelerations = 2 * c2 + 6 * c3 * delta_times
+        return positions, velocities, accelerations
+
+    def iter_setpoints(  # pylint: disable=too-many-locals
+        self,
+        dt: float,
+        start: float | None = None,
+        end: float | None = None,
+        *,
+        chunk_size: int = SETPOINT_CHUNK_SIZE,
+    ) -> Iterator[tuple[NDArray[float64], NDArray[float64], NDArray[float64]]]:
+        """
+        Generate the positions and velocities at a fixed rate, a chunk at a time.
+
+        The setpoints are evaluated lazily into buffers that are reused for every
+        chunk, so memory use does not grow with the length of the sequence. The
+        segments are found by advancing a cursor through the sequence with one
+        search per chunk, rather than searching for each setpoint.
+
+        :param dt: The time between setpoints.
+        :param start: The time of the first setpoint. Defaults to the start of the sequence.
+        :param end: The latest time of any setpoint. Defaults to the end of the sequence.
+        :param chunk_size: The maximum number of setpoints in each chunk.
+        :return: An iterator over chunks of times, positions, and velocities, with shapes
+            (number of setpoints,) and (number of setpoints, dim). The arrays are
+            overwritten by the next chunk, so copy them to keep them.
+        """
+        assert dt > 0, "The time between setpoints must be positive."
+        assert chunk_size > 0, "The chunk size must be positive."
+        assert self._size > 1, "There are no segments in the sequence"
+        start = self.start_time if start is None else start
+        end = self.end_time if end is None else end
+        self._validate_time(start)
+        self._validate_time(end)
+        count = max(math.floor((end - start) / dt + 1e-9) + 1, 0)
+        point_times = self._time[: self._size]
+        time_buffer = np.empty(chunk_size)
+        position_buffer = np.empty((chunk_size, self.dim))
+        velocity_buffer = np.empty((chunk_size, self.dim))
+        cursor = 0
+        for first in range(0, count, chunk_size):
+            times = time_buffer[: min(chunk_size, count - first)]
+            np.multiply(np.arange(first, first + len(times)), dt, out=times)
+            times += start
+            # Search for the segments from the cursor onwards, using the last segment
+            # for times at the end of the sequence
+            indices = cursor + np.searchsorted(point_times[cursor:], times, side="right") - 1
+            np.clip(indices, cursor, self._size - 2, out=indices)
+            cursor = int(indices[-1])
+            delta_times = (times - point_times[indices])[:, np.newaxis]
+            c0, c1, c2, c3 = np.moveaxis(self._coefficients[indices], -1, 0)
+            positions = position_buffer[: len(times)]
+            velocities = velocity_buffer[: len(times)]
+            positions[:] = c0 + delta_times * (c1 + delta_times * (c2 + delta_times * c3))
+            velocities[:] = c1 + delta_times * (2 * c2 + 3 * c3 * delta_times)
+            yield times, positions, velocities
+
+    def check_limits(
+        self,
+        max_speed: ArrayLike | None = None,
+        max_accel: ArrayLike | None = None,
+        max_jerk: ArrayLike | None = None,
+    ) -> list[LimitViolation]:
+        """
+        Find every segment where the speed, acceleration, or jerk of an axis exceeds its limit.
+
+        Velocity is quadratic, acceleration linear, and jerk constant over each
+        segment, so their exact peaks are found analytically from the segment
+        coefficients, for all segments at once, rather than by sampling.
+
+        :param max_speed: The speed limit, as one value for all axes or one per axis.
+            None skips checking speed.
+        :param max_accel: The acceleration limit, as one value for all axes or one per axis.
+            None skips checking acceleration.
+        :param max_jerk: The jerk limit, as one value for all axes or one per axis.
+            None skips checking jerk.
+        :return: The violations, ordered by segment and then by axis. Each segment and
+            axis has at most one violation for each quantity, at its peak.
+        """
+        dim = self._position.shape[1]
+        violations = []
+        checks: tuple[tuple[LimitQuantity, ArrayLike | None], ...] = (
+            ("speed", max_speed),
+            ("accel", max_accel),
+            ("jerk", max_jerk),
+        )
+        for quantity, limit in checks:
+            if limit is None:
+                continue
+            limits = np.asarray(limit, dtype=float64)
+            assert limits.shape in ((), (dim,)), f"There must be one {quantity} limit per axis."
+            limits = np.broadcast_to(limits, (dim,))
+            peak_times, peak_values = self._calculate_peaks(quantity)
+            exceeded = np.abs(peak_values) > limits * (1 + self.LIMIT_TOLERANCE)
+            for segment, axis in zip(*np.nonzero(exceeded)):
+                violations.append(
+                    LimitViolation(
+                        int(segment),
+                        int(axis),
+                        quantity,
+                        float(self._time[segment] + peak_times[segment, axis]),
+                        float(peak_values[segment, axis]),
+                        float(limits[axis]),
+                    )
+                )
+        violations.sort(key=lambda violation: (violation.segment, violation.axis))
+        return violations
+
+    def simplify(self, tolerance: float, velocity_tolerance: float | None = None) -> Sequence:
+        """
+        Return a copy of the sequence with the points that aren't needed removed.
+
+        Points are kept, as in the Douglas-Peucker algorithm adapted to PVT segments,
+        until the trajectory of the simplified sequence is within the tolerance of the
+        original at each of the original points and at three evenly spaced times within
+        each original segment.
+
+        :param tolerance: The maximum distance from the original position.
+        :param velocity_tolerance: The maximum difference from the original velocity, or
+            None to only limit the difference in position.
+        :return: The simplified sequence.
+        """
+        if self._size < 3:
+            return Sequence.from_arrays(self.times, self.positions, self.velocities)
+        indices = _select_hermite_knots(
+            self.times,
+            self.positions,
+            self.velocities,
+            tolerance,
+            velocity_tolerance=velocity_tolerance,
+            samples_per_segment=3,
+        )
+        return Sequence.from_arrays(
+            self.times[indices], self.positions[indices], self.velocities[indices]
+        )
 
     def save_to_file(self, filename: str) -> None:
         """
@@ -745,12 +2331,161 @@ class Sequence:
                 header += [f"{axis_names[dim_index]} Position"]
                 header += [f"{axis_names[dim_index]} Velocity"]
             file_writer.writerow(header)
-            # Write the data
-            for point in self._points:
-                row = [point.time]
-                for dim_index in range(self.dim):
-                    row += [point.position[dim_index], point.velocity[dim_index]]
-                file_writer.writerow(row)
+            # Write the data, alternating position and velocity values
+            position_velocity = np.stack((self.positions, self.velocities), axis=2)
+            file_writer.writerows(
+                np.column_stack((self.times, position_velocity.reshape(self._size, -1))).tolist()
+            )
+
+    def save_to_binary_file(self, filename: str) -> None:
+        """
+        Save the sequence to a binary file.
+
+        The file holds a header followed by the times, positions, and velocities
+        of the points as contiguous float64 blocks, which can be loaded again much
+        faster than a CSV file. See from_binary_file().
+
+        :param filename: The full name of the file, including the path.
+        """
+        header = np.array(
+            [(self.BINARY_MAGIC, self.BINARY_VERSION, self._position.shape[1], self._size)],
+            dtype=self.BINARY_HEADER,
+        )
+        with open(filename, "wb") as file:
+            header.tofile(file)
+            for block in (self.times, self.positions, self.velocities):
+                np.ascontiguousarray(block, dtype="<f8").tofile(file)
+
+    def _slow_down_to_limits(  # pylint: disable=protected-access
+        self, max_speeds: ArrayLike, max_accels: ArrayLike
+    ) -> tuple[NDArray[float64], NDArray[float64]]:
+        """
+        Return the times and velocities of the points, slowed down to keep within the limits.
+
+        Slowing the whole sequence down by a factor, by dividing the velocities and
+        multiplying the durations by it, divides the speed by the factor and the
+        acceleration by its square, so slowing it down by the largest factor any
+        segment needs always meets the limits. Usually only a few segments exceed
+        them, so instead each of those is slowed down just enough to meet them,
+        with the slowdown tapering off gradually over time around it, and this is
+        repeated until every segment is within the limits. The factor varies along
+        each segment, which accelerates it slightly, so the taper is kept slow
+        compared to the time the axes take to reach their maximum speeds. If that
+        doesn't meet the limits in time, or is slower, the uniform slowdown is used.
+
+        :param max_speeds: The maximum speed of each axis, or one maximum speed for all axes.
+        :param max_accels: The maximum acceleration of each axis, or one maximum
+            acceleration for all axes.
+        :return: The times and velocities of the points, with shapes (n,) and (n, dim).
+        """
+        factors = self._calculate_slowdown_factors(max_speeds, max_accels)
+        uniform_factor = factors.max(initial=1)
+        uniform_times = self.times[0] + (self.times - self.times[0]) * uniform_factor
+        uniform_velocities = self.velocities / uniform_factor
+
+        # The largest change in the logarithm of the factors per unit time
+        taper_rate = self.SLOWDOWN_TAPER * float(
+            np.min(np.asarray(max_accels, dtype=float64) / np.asarray(max_speeds, dtype=float64))
+        )
+        times = self.times
+        velocities = self.velocities
+        for _ in range(self.MAX_SLOWDOWN_ITERATIONS):
+            # Accelerations go with the square of the factors, so halve the tolerance
+            if np.all(factors <= 1 + self.LIMIT_TOLERANCE / 2):
+                break
+            # Slow down the points of each segment, taper the slowdown off over time on
+            # either side, and slow down each segment by the mean of its points' factors
+            log_factors = np.log(np.maximum(np.append(factors, 1), np.append(1, factors)))
+            spread = (times - times[0]) * taper_rate
+            log_factors = np.maximum(
+                np.maximum.accumulate(log_factors + spread) - spread,
+                np.maximum.accumulate((log_factors - spread)[::-1])[::-1] + spread,
+            )
+            point_factors = np.exp(log_factors)
+            segment_factors = (point_factors[:-1] + point_factors[1:]) / 2
+            velocities = velocities / point_factors[:, np.newaxis]
+            times = np.append(times[0], times[0] + np.cumsum(np.diff(times) * segment_factors))
+            factors = Sequence.from_arrays(
+                times, self.positions, velocities, copy=False
+            )._calculate_slowdown_factors(max_speeds, max_accels)
+
+        if np.any(factors > 1 + self.LIMIT_TOLERANCE / 2) or np.sum(np.diff(times)) > np.sum(
+            np.diff(uniform_times)
+        ):
+            return uniform_times, uniform_velocities
+        return times, velocities
+
+    def _calculate_slowdown_factors(
+        self, max_speeds: ArrayLike, max_accels: ArrayLike
+    ) -> NDArray[float64]:
+        """
+        Return the factor by which each segment must be slowed down to meet the limits.
+
+        :param max_speeds: The maximum speed of each axis, or one maximum speed for all axes.
+        :param max_accels: The maximum acceleration of each axis, or one maximum
+            acceleration for all axes.
+        :return: The factor of each segment, which is 1 for segments within the limits.
+        """
+        _, peak_speeds = self._calculate_peaks("speed")
+        _, peak_accels = self._calculate_peaks("accel")
+        factors: NDArray[float64] = np.max(
+            np.maximum(np.abs(peak_speeds) / max_speeds, np.sqrt(np.abs(peak_accels) / max_accels)),
+            axis=1,
+            initial=1,
+        )
+        return factors
+
+    def _calculate_peaks(
+        self, quantity: LimitQuantity
+    ) -> tuple[NDArray[float64], NDArray[float64]]:
+        """
+        Find the value furthest from zero of a quantity over each segment, on each axis.
+
+        :param quantity: The quantity to find the peaks of.
+        :return: The times of the peaks relative to the start of each segment, and the
+            values of the quantity at the peaks, each with shape (number of segments, dim).
+        """
+        coefficients = self.coefficients
+        delta_times = np.broadcast_to(np.diff(self.times)[:, np.newaxis], coefficients.shape[:2])
+        _, c1, c2, c3 = np.moveaxis(coefficients, -1, 0)
+        zeros = np.zeros_like(delta_times)
+        # The candidate times of the peak, and the values of the quantity at those times
+        if quantity == "speed":
+            # Velocity peaks at the segment ends, or where acceleration crosses zero
+            stationary = np.divide(-c2, 3 * c3, out=np.zeros_like(c3), where=c3 != 0)
+            candidates = np.stack([zeros, delta_times, np.clip(stationary, 0, delta_times)])
+            values = c1 + candidates * (2 * c2 + 3 * c3 * candidates)
+        elif quantity == "accel":
+            candidates = np.stack([zeros, delta_times])
+            values = 2 * c2 + 6 * c3 * candidates
+        else:
+            candidates = zeros[np.newaxis]
+            values = 6 * c3[np.newaxis]
+        peaks = np.argmax(np.abs(values), axis=0)[np.newaxis]
+        return (
+            np.take_along_axis(candidates, peaks, axis=0)[0],
+            np.take_along_axis(values, peaks, axis=0)[0],
+        )
+
+    def _reserve(self, capacity: int, dim: int) -> None:
+        """
+        Grow the underlying arrays to hold the given number of points.
+
+        :param capacity: The number of points to make room for.
+        :param dim: The dimension of the points.
+        """
+        size = self._size
+        time = np.empty(capacity)
+        position = np.empty((capacity, dim))
+        velocity = np.empty((capacity, dim))
+        coefficients = np.empty((capacity - 1, dim, 4))
+        if size > 0:
+            time[:size] = self._time[:size]
+            position[:size] = self._position[:size]
+            velocity[:size] = self._velocity[:size]
+            coefficients[: size - 1] = self._coefficients[: size - 1]
+        self._time, self._position, self._velocity = time, position, velocity
+        self._coefficients = coefficients
 
     def _validate_time(self, time: float) -> None:
         """
@@ -758,27 +2493,130 @@ class Sequence:
 
         :param time: The time to validate.
         """
-        assert len(self._points) > 0, "There are no points in the sequence"
-        time_min = self._points[0].time
-        time_max = self._points[-1].time
+        assert self._size > 0, "There are no points in the sequence"
+        time_min = self._time[0]
+        time_max = self._time[self._size - 1]
         assert (
             time_min <= time <= time_max + 1e-14
         ), f"Time {time} is outside of sequence range ({time_min}, {time_max})"
 
-    def _get_segment_at_time(self, time: float) -> Segment:
+    def _get_segment_index_at_time(self, time: float) -> int:
         """
-        Get the segment corresponding to the given time.
+        Get the index of the segment corresponding to the given time.
 
         :param time: The time at which to get the segment.
         """
         self._validate_time(time)
-        if time < self._points[-1].time:
-            # Return the index of the last point whose time is less than or equal to the given time
-            index = next(i for i in range(len(self._points)) if time < self._points[i].time) - 1
-        else:
+        assert self._size > 1, "There are no segments in the sequence"
+        times = self._time
+        if time >= times[self._size - 1]:
             # Return the index of the last segment
-            index = len(self._segments) - 1
-        return self._segments[index]
+            index = self._size - 2
+        else:
+            # Return the index of the last point whose time is less than or equal to the given
+            # time. Check the segment at the cursor and the one after it first, so that
+            # monotonic queries take constant time, then fall back on a binary search.
+            index = self._segment_cursor
+            if not times[index] <= time < times[index + 1]:
+                index += 1
+                if not times[index] <= time < times[index + 1]:
+                    index = bisect_right(times, time, hi=self._size) - 1
+        self._segment_cursor = index
+        return index
+
+    @staticmethod
+    def from_arrays(  # pylint: disable=protected-access
+        times: ArrayLike, positions: ArrayLike, velocities: ArrayLike, copy: bool = True
+    ) -> Sequence:
+        """
+        Return a PVT sequence from arrays of point times, positions, and velocities.
+
+        The arrays are validated and the coefficients of every segment are
+        calculated in single vectorized operations, which is much faster
+        than appending the points one at a time.
+
+        :param times: The time of each point, with shape (n,).
+        :param positions: The position of each point, with shape (n, dim).
+        :param velocities: The velocity of each point, with shape (n, dim).
+        :param copy: Whether to copy the arrays. If False, arrays that are already
+            float64 are used as they are, and must not be modified afterwards.
+            Appending or updating points in the sequence still copies them first.
+        :return: The PVT sequence.
+        """
+        # np.array(copy=False) raises in NumPy 2 if a conversion is needed, so use asarray()
+        convert = np.array if copy else np.asarray
+        time_array = convert(times, dtype=float64)
+        position_array = convert(positions, dtype=float64)
+        velocity_array = convert(velocities, dtype=float64)
+        if not copy:
+            # Never write to the given arrays. Updating the sequence copies them first.
+            time_array, position_array, velocity_array = (
+                _read_only(array) for array in (time_array, position_array, velocity_array)
+            )
+        assert time_array.ndim == 1, "Times must be a one-dimensional array."
+        assert position_array.shape[:1] == time_array.shape and (
+            position_array.ndim == 2
+        ), "Positions must be an array with one row per time."
+        assert (
+            velocity_array.shape == position_array.shape
+        ), "Position must have the same dimension as velocity."
+        assert np.all(np.diff(time_array) >= 0), "Times must be in non-decreasing order."
+        sequence = Sequence()
+        sequence._size = len(time_array)
+        sequence._time = time_array
+        sequence._position = position_array
+        sequence._velocity = velocity_array
+        sequence._coefficients = _calculate_coefficients(time_array, position_array, velocity_array)
+        return sequence
+
+    @staticmethod
+    def from_binary_file(filename: str, memory_map: bool = True) -> Sequence:
+        """
+        Return a PVT sequence from a binary file written by save_to_binary_file().
+
+        By default the file is memory-mapped, and the sequence reads its times,
+        positions, and velocities straight from the mapping without copying them,
+        so only the segment coefficients are calculated when loading.
+
+        :param filename: The full name of the file, including the path.
+        :param memory_map: Whether to memory-map the file. If False, the data is read
+            into memory instead, so the file isn't held open and can be removed or
+            replaced while the sequence is in use, which Windows doesn't allow for
+            mapped files.
+        :return: The PVT sequence.
+        """
+        header = np.fromfile(filename, dtype=Sequence.BINARY_HEADER, count=1)
+        assert (
+            len(header) == 1 and header["magic"][0] == Sequence.BINARY_MAGIC
+        ), f"{filename} is not a binary PVT sequence file."
+        assert (
+            header["version"][0] == Sequence.BINARY_VERSION
+        ), f"Unsupported binary PVT sequence file version {header['version'][0]}."
+        dim, size = int(header["dim"][0]), int(header["size"][0])
+        if size == 0:
+            return Sequence.from_arrays(np.empty(0), np.empty((0, dim)), np.empty((0, dim)))
+        data = (
+            np.memmap(
+                filename,
+                dtype="<f8",
+                mode="r",
+                offset=Sequence.BINARY_HEADER.itemsize,
+                shape=(size * (1 + 2 * dim),),
+            )
+            if memory_map
+            else np.fromfile(
+                filename,
+                dtype="<f8",
+                count=size * (1 + 2 * dim),
+                offset=Sequence.BINARY_HEADER.itemsize,
+            )
+        )
+        return Sequence.from_arrays(
+            data[:size],
+            data[size : size * (1 + dim)].reshape(size, dim),
+            data[size * (1 + dim) :].reshape(size, dim),
+            copy=False,
+        )
 
     @staticmethod
     def from_parameter_sequences(
@@ -799,17 +2637,19 @@ class Sequence:
             for each dimension.
         :return: The PVT sequence with generated parameters.
         """
-        sequence = Sequence()
-        dim = len(position_sequences)
-        for point_index, time in enumerate(time_sequence):
-            positions = tuple(position_sequences[i][point_index] for i in range(dim))
-            velocities = tuple(velocity_sequences[i][point_index] for i in range(dim))
-            sequence.append_point(Point(positions, velocities, time))
-        return sequence
+        return Sequence.from_arrays(
+            time_sequence,
+            np.asarray(position_sequences, dtype=float64).T,
+            np.asarray(velocity_sequences, dtype=float64).T,
+        )
 
     @staticmethod
     def from_csv(
-        filename: str, target_speed: float | None = None, target_accel: float | None = None
+        filename: str,
+        target_speed: float | None = None,
+        target_accel: float | None = None,
+        *,
+        method: VelocityMethod = "continuous_acceleration",
     ) -> Sequence:
         """
         Return a PVT sequence with data loaded from a CSV file.
@@ -847,6 +2687,8 @@ class Sequence:
         :param filename: The name of the csv file to load.
         :param target_speed: The target speed used for generating velocities and times.
         :param target_accel: The target acceleration used for generating velocities and times.
+        :param method: The method used to generate missing velocities from position-time
+            data. See generate_velocities().
         :return: The generated PVT sequence.
         """
 
@@ -888,11 +2730,7 @@ class Sequence:
         # Call the appropriate generation function
         match gen_type:
             case GenerationType.NONE:
-                return Sequence.from_parameter_sequences(
-                    data.time_sequence,
-                    data.position_sequences,
-                    data.velocity_sequences,  # type: ignore
-                )
+                return Sequence.from_arrays(data.times, data.positions, data.velocities)
             case GenerationType.TIME_AND_VELOCITY:
                 assert (
                     target_speed is not None and target_accel is not None
@@ -901,23 +2739,25 @@ class Sequence:
                     data.position_sequences, target_speed, target_accel
                 )
             case GenerationType.POSITION:
-                return Sequence.generate_positions(
-                    data.time_sequence,
-                    data.velocity_sequences,  # type: ignore
-                )
+                return Sequence.generate_positions(data.time_sequence, data.velocities.T.tolist())
             case GenerationType.VELOCITY:
+                # Undefined velocities are read as NaN, which generate_velocities() accepts
                 return Sequence.generate_velocities(
                     data.time_sequence,
                     data.position_sequences,
-                    data.velocity_sequences if data.contains_velocity_data else None,
+                    data.velocities.T.tolist() if data.contains_velocity_data else None,
+                    method=method,
                 )
 
     @staticmethod
-    def generate_times_and_velocities(  # pylint: disable=too-many-locals
+    def generate_times_and_velocities(  # pylint: disable=too-many-locals,too-many-arguments
         position_sequences: list[list[float]],
         target_speed: float,
         target_accel: float,
         resample_number: int | None = None,
+        *,
+        target_jerk: float | None = None,
+        resample_tolerance: float | None = None,
     ) -> Sequence:
         """
         Return a PVT sequence from a sequence of position keypoints.
@@ -930,153 +2770,214 @@ class Sequence:
         information by traversing it using a trapezoidal motion
         profile.
 
+        If a target jerk is given, the trapezoidal speed profile is smoothed
+        into an S-curve by a moving average over time, which keeps the jerk
+        of the speed along the path within the target. Each stretch between
+        the ends and the points where every axis reverses is smoothed on its
+        own, so the sequence still stops at those points, and becomes longer
+        by twice the target acceleration over the target jerk for each stretch.
+
         This generation scheme attempts to keep speed and acceleration
         less than the specified target values, but does not guarantee it.
         Generally speaking, a higher resample number will bring the
-        generated trajectory closer to respecting these limits.
+        generated trajectory closer to respecting these limits. With a
+        target jerk, the speed at each point is averaged with its
+        neighbours, so sharp curves may also be taken slightly faster
+        than the target acceleration allows.
 
         :param position_sequences: The position sequences for each axis.
         :param target_speed: The target speed used for generating velocities and times.
         :param target_accel: The target acceleration used for generating velocities and times.
         :param resample_num: The number of points to resample the sequence by, or None to use
             the specified points.
+        :param target_jerk: The target jerk used for generating velocities and times, or None
+            to use a trapezoidal speed profile.
+        :param resample_tolerance: The maximum distance between the generated PVT segments and
+            the path, or None to keep every sample point. If given, only as many points are
+            kept as are needed to meet the tolerance, so curves get dense points and straight
+            sections get sparse ones. The tolerance is also checked between the calculation
+            points, and points are added between them where they are too sparse to meet it.
         :return: The generated PVT sequence.
         """
-        # Setup
+        # Setup. The path records its own phases when profiling.
+        profile = _profile
         dim = len(position_sequences)
-        generated_sequence = Sequence()
         geo_path = GeometricPath(position_sequences)
-        u_sample = (
-            geo_path.parameterized_lengths
-            if resample_number is None
-            else (
-                [0]
-                + [
-                    geo_path.calc_u_at_length(i * geo_path.length / (resample_number - 1))
-                    for i in range(1, resample_number - 1)
-                ]
-                + [1]
-            )
+        start = perf_counter() if profile is not None else 0.0
+        u_sample = _resample_path(geo_path, resample_number)
+        if profile is not None:
+            start = profile.add_phase("resampling", start, len(u_sample))
+        u_calc, reversal_counts = _generate_calculation_points(u_sample, geo_path)
+        if profile is not None:
+            start = profile.add_phase("reversal detection", start, len(u_calc))
+        derivatives = geo_path.calc_derivatives(u_calc)
+        dx_dl, d2x_dl2 = _calculate_length_derivatives(derivatives[1], derivatives[2])
+        lengths = geo_path.calc_lengths_at_u(u_calc)
+        if profile is not None:
+            start = profile.add_phase("path evaluation", start, len(u_calc))
+
+        # Calculate speed limits from total acceleration, working with squared speeds
+        denominators = np.sum(d2x_dl2**2, axis=1)
+        squared_speeds = np.minimum(
+            target_speed**2,
+            np.divide(
+                target_accel,
+                np.sqrt(denominators),
+                out=np.full_like(denominators, np.inf),
+                where=denominators != 0,
+            ),
         )
-
-        def generate_calculation_points(
-            u_sample: list[float], geo_path: GeometricPath
-        ) -> tuple[list[float], dict[int, list[int]]]:
-            """
-            Generate a list of critical points used for calculating the speed profile.
-
-            This function generates a list of calculation points by:
-            - Adding intermediate points between the sample points, and
-            - Adding critical points, or points where one or more axis changes direction
-            """
-            # For each sample point, use N points in calculations
-            u_calc = [0.0]
-            for u_prev, u_next in zip(u_sample[:-1], u_sample[1:]):
-                parameterized_sublength = (u_next - u_prev) / 10
-                for i in range(1, 10):
-                    u_calc.append(u_prev + parameterized_sublength * i)
-                u_calc.append(u_next)
-
-            # Find points where axes change directions
-            reversals: dict[int, list[int]] = {}
-            segment_index = 0
-            while segment_index < len(u_calc) - 1:
-                initial_direction = geo_path.direction(u_calc[segment_index])
-                final_direction = geo_path.direction(u_calc[segment_index + 1])
-                u_inserts = {}
-                for d in range(dim):
-                    if initial_direction[d] * final_direction[d] < 0:
-                        if dim > 1:
-                            u_inserts[d] = newton(
-                                partial(lambda u, d: geo_path.dx_du(u)[d], d=d),
-                                (u_calc[segment_index] + u_calc[segment_index + 1]) / 2,
-                                partial(lambda u, d: geo_path.dx_du(u, 2)[d], d=d),
-                                fprime2=partial(lambda u, d: geo_path.dx_du(u, 3)[d], d=d),
-                            )
-                        else:
-                            u_inserts[d] = bisect(
-                                partial(lambda u, d: geo_path.dx_du(u)[d], d=d),
-                                u_calc[segment_index],
-                                u_calc[segment_index + 1],
-                            )
-                for d, u_insert in sorted(u_inserts.items(), key=lambda item: item[1]):
-                    if math.isclose(u_insert, u_calc[segment_index]):
-                        reversals.setdefault(segment_index, [])
-                        reversals[segment_index].append(d)
-                    else:
-                        segment_index += 1
-                        reversals.setdefault(segment_index, [])
-                        reversals[segment_index].append(d)
-                        u_calc = u_calc[:segment_index] + [u_insert] + u_calc[segment_index:]
-                segment_index += 1
-            return u_calc, reversals
-
-        u_calc, reversals = generate_calculation_points(u_sample, geo_path)
-
-        # Calculate speed limits from end point
-        segment_lengths = [
-            geo_path.segment_length(u_calc[i], u_calc[i + 1]) for i in range(len(u_calc) - 1)
-        ]
-        speed_limits = [target_speed for _ in u_calc]
-        speed_limits[0] = speed_limits[-1] = 0
-        for i in reversed(range(1, len(speed_limits) - 1)):
-            # Calculate the speed limit from max deceleration over the path length
-            speed_limits[i] = min(
-                speed_limits[i],
-                (speed_limits[i + 1] ** 2 + 2 * target_accel * segment_lengths[i]) ** 0.5,
-            )
-            # Calculate the speed limit from total acceleration
-            if i in reversals and len(reversals[i]) == dim:
-                speed_limits[i] = min(speed_limits[i], 0)
-            elif (
-                denominator := sum(d2xi_dl2**2 for d2xi_dl2 in geo_path.d2x_dl2(u_calc[i]))
-            ) != 0:
-                speed_limits[i] = min(speed_limits[i], (target_accel**2 / denominator) ** (1 / 4))
-
-        # Calculate speed limits from start point and assemble sequence
-        time = 0.0
-        generated_sequence.append_point(
-            Point(
-                geo_path.position(u_sample[0]),
-                tuple(speed_limits[0] * d for d in geo_path.direction(u_sample[0])),
-                time,
-            )
+        stops = reversal_counts == dim
+        squared_speeds[stops] = 0
+        squared_speeds[[0, -1]] = 0
+
+        # Calculate speed limits from max deceleration to each later point, and then from
+        # max acceleration from each earlier point. The squared speed changes linearly with
+        # path length, so each pass is a running minimum offset by the path length.
+        reach = 2 * target_accel * (lengths - lengths[0])
+        squared_speeds = np.minimum.accumulate((squared_speeds + reach)[::-1])[::-1] - reach
+        squared_speeds = np.minimum.accumulate(squared_speeds - reach) + reach
+        speed_limits = np.sqrt(np.maximum(squared_speeds, 0))
+        if profile is not None:
+            start = profile.add_phase("speed limits", start, len(u_calc))
+
+        # Assemble sequence
+        segment_lengths = np.diff(lengths)
+        average_speeds = (speed_limits[:-1] + speed_limits[1:]) / 2
+        delta_times = np.where(
+            average_speeds == 0,
+            np.sqrt(segment_lengths / target_accel),
+            segment_lengths / np.where(average_speeds == 0, 1, average_speeds),
         )
-        next_sample_index = 1
-        for i in range(1, len(speed_limits)):
-            # Calculate the speed limit from max acceleration over the path length
-            speed_limits[i] = min(
-                speed_limits[i],
-                (speed_limits[i - 1] ** 2 + 2 * target_accel * segment_lengths[i - 1]) ** 0.5,
+        times = np.append(0, np.cumsum(delta_times))
+        stop_indices = np.empty(0, dtype=np.intp)
+        if target_jerk is not None:
+            times, speed_limits = _filter_speed_profile(
+                times, lengths, speed_limits, 2 * target_accel / target_jerk, stops
             )
-            if (average_speed := sum(speed_limits[i - 1 : i + 1]) / 2) == 0:
-                time += (segment_lengths[i - 1] / target_accel) ** 0.5
-            else:
-                time += segment_lengths[i - 1] / average_speed
-            if u_calc[i] >= u_sample[next_sample_index]:
-                generated_sequence.append_point(
-                    Point(
-                        geo_path.position(u_calc[i]),
-                        tuple(speed_limits[i] * d for d in geo_path.direction(u_calc[i])),
-                        time,
-                    )
+            # The filtered profile takes an extra window to pass each stop, which a
+            # segment spanning the stop can't follow, so keep the stops as points
+            stop_indices = np.flatnonzero(stops)
+        if resample_tolerance is None:
+            sample_indices = np.union1d(np.searchsorted(u_calc, u_sample), stop_indices)
+            sequence = Sequence.from_arrays(
+                times[sample_indices],
+                derivatives[0][sample_indices],
+                speed_limits[sample_indices, np.newaxis] * dx_dl[sample_indices],
+            )
+        else:
+            sequence = Sequence.from_arrays(
+                *_select_path_knots(
+                    geo_path,
+                    times,
+                    lengths,
+                    speed_limits,
+                    resample_tolerance,
+                    fixed_knots=stop_indices,
                 )
-                next_sample_index += 1
+            )
+        if profile is not None:
+            profile.add_phase("assembly", start, len(sequence.times))
+        return sequence
+
+    @staticmethod
+    def generate_time_optimal(  # pylint: disable=too-many-locals,protected-access
+        position_sequences: list[list[float]],
+        max_speeds: float | list[float],
+        max_accels: float | list[float],
+        resample_number: int | None = None,
+    ) -> Sequence:
+        """
+        Return the fastest PVT sequence through a sequence of position keypoints.
+
+        This function fits a geometric spline over the position information,
+        like generate_times_and_velocities(), but then traverses it in minimum
+        time while keeping the speed and acceleration of each axis within its
+        own limits. For more information, see generate_speeds_time_optimal().
+
+        The speed profile respects the limits along the spline at each of the
+        calculation points. The cubic PVT segments that join the sample points
+        only follow it approximately, so any segment that would exceed a limit
+        is then slowed down to respect it, which makes the limits hold everywhere
+        along the generated sequence. The slowdown tapers off around each such
+        segment, and never takes longer than slowing the whole sequence down.
 
-        return generated_sequence
+        :param position_sequences: The position sequences for each axis.
+        :param max_speeds: The maximum speed of each axis, or one maximum speed for all axes.
+        :param max_accels: The maximum acceleration of each axis, or one maximum acceleration
+            for all axes.
+        :param resample_number: The number of points to resample the sequence by, or None
+            to use the specified points.
+        :return: The generated PVT sequence.
+        """
+        # Setup. The path records its own phases when profiling.
+        profile = _profile
+        geo_path = GeometricPath(position_sequences)
+        start = perf_counter() if profile is not None else 0.0
+        u_sample = _resample_path(geo_path, resample_number)
+        if profile is not None:
+            start = profile.add_phase("resampling", start, len(u_sample))
+        u_calc, reversal_counts = _generate_calculation_points(u_sample, geo_path)
+        if profile is not None:
+            start = profile.add_phase("reversal detection", start, len(u_calc))
+        speeds = generate_speeds_time_optimal(
+            geo_path, u_calc, max_speeds, max_accels, reversal_counts == len(position_sequences)
+        )
+        if profile is not None:
+            start = profile.add_phase("time-optimal speeds", start, len(u_calc))
+
+        # Find the time of each point from the average speed of each step. A step that
+        # starts and ends at rest accelerates from rest as hard as possible, and back.
+        segment_lengths = np.diff(geo_path.calc_lengths_at_u(u_calc))
+        sum_speeds = speeds[:-1] + speeds[1:]
+        min_accel = float(np.min(max_accels))
+        delta_times = np.where(
+            sum_speeds == 0,
+            2 * np.sqrt(segment_lengths / min_accel),
+            2 * segment_lengths / np.where(sum_speeds == 0, 1, sum_speeds),
+        )
+        times = np.append(0, np.cumsum(delta_times))
+        derivatives = geo_path.calc_derivatives(u_sample)
+        dx_dl, _ = _calculate_length_derivatives(derivatives[1], derivatives[2])
+        sample_indices = np.searchsorted(u_calc, u_sample)
+        sequence = Sequence.from_arrays(
+            times[sample_indices],
+            derivatives[0],
+            speeds[sample_indices, np.newaxis] * dx_dl,
+        )
+        if profile is not None:
+            start = profile.add_phase("assembly", start, len(sample_indices))
+
+        # The cubic segments between the sample points don't follow the speed
+        # profile exactly, so slow down any that exceed the limits
+        times, velocities = sequence._slow_down_to_limits(max_speeds, max_accels)
+        sequence = Sequence.from_arrays(times, sequence.positions, velocities)
+        if profile is not None:
+            profile.add_phase("limit slowdown", start, len(times))
+        return sequence
 
     @staticmethod
     def generate_velocities(
         time_sequence: list[float],
         position_sequences: list[list[float]],
         velocity_sequences: list[list[float | None]] | None,
+        *,
+        method: VelocityMethod = "continuous_acceleration",
     ) -> Sequence:
         """
         Return a PVT sequence from position-time data or position-velocity-time data.
 
-        This function calculates velocities by enforcing acceleration be
-        continuous at each segment transition. For more information, see
-        the function generate_velocities_continuous_acceleration().
+        By default, this function calculates velocities by enforcing acceleration
+        be continuous at each segment transition. For more information, see
+        the function generate_velocities_continuous_acceleration(). All
+        axes, and all gaps of undefined velocities, are solved together
+        as a single banded system.
+
+        With the "finite_difference" method, each velocity is instead the average
+        of the slopes of its neighbouring segments, as in
+        interpolate_velocity_finite_difference(). Acceleration is then not
+        continuous, but each velocity only depends on its neighbouring points,
+        so no system has to be solved.
 
         :param time_sequence: The sequence of time values.
         :param position_sequences: An array of position sequences, one
@@ -1084,57 +2985,123 @@ class Sequence:
         :param velocity_sequences: An array of velocity sequences, one
             for each dimension. This must either have the same size as
             position_sequences, or be None to denote all values be generated.
+            Undefined values may be given as None or NaN.
+        :param method: The method used to generate the undefined velocities.
         :return: The PVT sequence with generated parameters.
         """
         # Setup
+        profile = _profile
+        start = perf_counter() if profile is not None else 0.0
         sequence_dim = len(position_sequences)
         sequence_length = len(time_sequence)
-        generated_sequence = Sequence()
+        delta_times = np.diff(np.asarray(time_sequence, dtype=float64))
+        delta_positions = np.diff(np.asarray(position_sequences, dtype=float64), axis=1)
 
         # Generate velocities
-        if velocity_sequences is None:
-            # Generate all velocities
-            velocity_sequences = []
-            for dim in range(sequence_dim):
-                velocity_sequences.append(
-                    generate_velocities_continuous_acceleration(  # type: ignore
-                        position_sequences[dim], time_sequence, 0, 0
-                    )
-                )
+        if method == "finite_difference":
+            if velocity_sequences is None:
+                velocities = np.full((sequence_dim, sequence_length), np.nan)
+            else:
+                velocities = np.array(velocity_sequences, dtype=float64)
+            # Set zero velocity at endpoints
+            velocities[:, [0, -1]] = np.nan_to_num(velocities[:, [0, -1]])
+            _fill_velocity_gaps_finite_difference(velocities, delta_times, delta_positions)
+        elif velocity_sequences is None:
+            # Generate all velocities. Every axis shares the same system, so solve
+            # them together with one right-hand side per axis.
+            velocities = np.zeros((sequence_dim, sequence_length))
+            run_starts = np.zeros(sequence_length - 1, dtype=bool)
+            run_starts[0] = True
+            velocities[:, 1:-1] = _solve_velocities_continuous_acceleration(
+                delta_times,
+                delta_positions.T,
+                run_starts,
+                np.zeros((1, sequence_dim)),
+                np.zeros((1, sequence_dim)),
+            )[1:].T
         else:
-            # Generate some velocities
-            for dim in range(sequence_dim):
-                # Set zero velocity at endpoints
-                for endpoint_index in (0, sequence_length - 1):
-                    if velocity_sequences[dim][endpoint_index] is None:
-                        velocity_sequences[dim][endpoint_index] = 0
-                # Generate the rest
-                gen_start_index = None
-                for point_index in range(1, sequence_length - 1):
-                    # Check for the first undefined velocity in a sequence of undefined velocities
-                    if gen_start_index is None and velocity_sequences[dim][point_index] is None:
-                        gen_start_index = point_index - 1
-                    # Check for the end of a sequence of undefined velocities
-                    if (
-                        gen_start_index is not None
-                        and velocity_sequences[dim][point_index + 1] is not None
-                    ):
-                        velocity_sequences[dim][
-                            gen_start_index : point_index + 2
-                        ] = generate_velocities_continuous_acceleration(
-                            position_sequences[dim][gen_start_index : point_index + 2],
-                            time_sequence[gen_start_index : point_index + 2],
-                            velocity_sequences[dim][gen_start_index],  # type: ignore
-                            velocity_sequences[dim][point_index + 1],  # type: ignore
-                        )
-                        gen_start_index = None
-        # Append the points
-        for point_index in range(sequence_length):
-            positions = [position_sequences[i][point_index] for i in range(sequence_dim)]
-            velocities = [velocity_sequences[i][point_index] for i in range(sequence_dim)]
-            time = time_sequence[point_index]
-            generated_sequence.append_point(Point(positions, velocities, time))  # type: ignore
-        return generated_sequence
+            # Generate some velocities. Undefined values are read as NaN.
+            velocities = np.array(velocity_sequences, dtype=float64)
+            # Set zero velocity at endpoints
+            velocities[:, [0, -1]] = np.nan_to_num(velocities[:, [0, -1]])
+            # Generate the rest
+            _fill_velocity_gaps_continuous_acceleration(velocities, delta_times, delta_positions)
+        if profile is not None:
+            start = profile.add_phase("velocity generation", start, sequence_length)
+
+        # Assemble sequence
+        sequence = Sequence.from_arrays(
+            time_sequence, np.asarray(position_sequences, dtype=float64).T, velocities.T
+        )
+        if profile is not None:
+            profile.add_phase("assembly", start, sequence_length)
+        return sequence
+
+    @staticmethod
+    def generate_velocities_batch(  # pylint: disable=protected-access,too-many-locals
+        time_sequences: list[list[float]], position_sequences: list[list[list[float]]]
+    ) -> list[Sequence]:
+        """
+        Return a PVT sequence for each of many moves from their position-time data.
+
+        This is equivalent to calling generate_velocities() without velocity data
+        for each move, but the moves are packed into a single block-banded system,
+        so that all of them are solved together with one vectorized call. This is
+        much faster when generating many small moves.
+
+        The returned sequences are read-only views of arrays shared by all of the
+        moves. Appending or updating points in a sequence copies it first.
+
+        :param time_sequences: The sequence of time values of each move.
+        :param position_sequences: The position sequences of each move, one for
+            each dimension. Every move must have the same number of dimensions.
+        :return: The PVT sequence of each move, with zero velocity at its first
+            and last points.
+        """
+        assert len(time_sequences) == len(
+            position_sequences
+        ), "There must be one position sequence per time sequence."
+        if not time_sequences:
+            return []
+        # Pack the points of every move one after another
+        times = np.concatenate([np.asarray(sequence, dtype=float64) for sequence in time_sequences])
+        positions = np.concatenate(
+            [np.asarray(sequence, dtype=float64).T for sequence in position_sequences]
+        )
+        lengths = np.array([len(sequence) for sequence in time_sequences])
+        assert positions.shape[0] == len(times), "Each position must have a time."
+        assert np.all(lengths > 1), "Each move must have at least two points."
+        offsets = np.cumsum(lengths) - lengths
+        # Each move is a separate run of segments. Skip the segments between moves.
+        in_move = np.ones(len(times) - 1, dtype=bool)
+        in_move[offsets[1:] - 1] = False
+        delta_times = np.diff(times)[in_move]
+        assert np.all(delta_times > 0), "Times must be in increasing order."
+        run_starts = np.zeros(len(delta_times), dtype=bool)
+        run_starts[offsets - np.arange(len(offsets))] = True
+        start_velocities = _solve_velocities_continuous_acceleration(
+            delta_times,
+            np.diff(positions, axis=0)[in_move],
+            run_starts,
+            np.zeros((len(lengths), positions.shape[1])),
+            np.zeros((len(lengths), positions.shape[1])),
+        )
+        velocities = np.zeros_like(positions)
+        velocities[np.flatnonzero(in_move)[~run_starts]] = start_velocities[~run_starts]
+        coefficients = _calculate_coefficients(times, positions, velocities)
+        times, positions, velocities, coefficients = (
+            _read_only(array) for array in (times, positions, velocities, coefficients)
+        )
+        sequences = []
+        for offset, length in zip(offsets.tolist(), lengths.tolist()):
+            sequence = Sequence()
+            sequence._size = length
+            sequence._time = times[offset : offset + length]
+            sequence._position = positions[offset : offset + length]
+            sequence._velocity = velocities[offset : offset + length]
+            sequence._coefficients = coefficients[offset : offset + length - 1]
+            sequences.append(sequence)
+        return sequences
 
     @staticmethod
     def generate_positions(
@@ -1154,23 +3121,152 @@ class Sequence:
         :return: The PVT sequence with generated parameters.
         """
         # Setup
-        sequence_dim = len(velocity_sequences)
         sequence_length = len(time_sequence)
-        generated_sequence = Sequence()
 
         # Generate positions
-        position_sequences = []
-        for dim in range(sequence_dim):
-            position_sequences.append(
-                generate_positions_continuous_acceleration(
-                    velocity_sequences[dim], time_sequence, 0, 0
-                )
-            )
+        position_sequences = [
+            generate_positions_continuous_acceleration(velocities, time_sequence, 0, 0)[
+                :sequence_length
+            ]
+            for velocities in velocity_sequences
+        ]
+        return Sequence.from_arrays(
+            time_sequence,
+            np.asarray(position_sequences, dtype=float64).T,
+            np.asarray(velocity_sequences, dtype=float64).T,
+        )
+
+
+@cache
+def _source_digest() -> bytes:
+    """Return a hash of this file, which identifies the version of the generation code."""
+    with open(__file__, "rb") as file:
+        return hashlib.sha256(file.read()).digest()
+
+
+class SequenceCache:
+    """
+    An on-disk cache of PVT sequences generated from CSV files.
+
+    Each sequence is stored in the binary format of Sequence.save_to_binary_file(),
+    under a hash of the contents of its CSV file, its generation parameters, and
+    the version of this file, so that changing any of them generates it again.
+    Once the cache grows beyond its maximum size, the least recently used
+    sequences are removed.
+    """
+
+    DEFAULT_MAX_SIZE = 1 << 30
+    """The default maximum total size of the cached files, in bytes."""
+    FILE_EXTENSION = ".pvtb"
+    """The extension of the cached files."""
+    READ_SIZE = 1 << 20
+    """The number of bytes to read from a CSV file at a time when hashing it."""
+
+    def __init__(self, directory: str, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        """
+        Initialize the cache, creating its directory if needed.
+
+        :param directory: The directory to store the cached sequences in.
+        :param max_size: The maximum total size of the cached files, in bytes.
+        """
+        assert max_size >= 0, "The maximum size must not be negative."
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._max_size = max_size
+
+    @property
+    def directory(self) -> str:
+        """The directory the cached sequences are stored in."""
+        return self._directory
+
+    @property
+    def max_size(self) -> int:
+        """The maximum total size of the cached files, in bytes."""
+        return self._max_size
+
+    def from_csv(
+        self,
+        filename: str,
+        target_speed: float | None = None,
+        target_accel: float | None = None,
+        *,
+        method: VelocityMethod = "continuous_acceleration",
+    ) -> Sequence:
+        """
+        Return a PVT sequence with data loaded from a CSV file, using the cache if possible.
+
+        This is equivalent to Sequence.from_csv(), but if the sequence has been
+        generated before from the same data and parameters, it is loaded from the
+        cache instead.
+
+        :param filename: The name of the csv file to load.
+        :param target_speed: The target speed used for generating velocities and times.
+        :param target_accel: The target acceleration used for generating velocities and times.
+        :param method: The method used to generate missing velocities from position-time
+            data. See Sequence.generate_velocities().
+        :return: The generated PVT sequence.
+        """
+        path = os.path.join(
+            self._directory,
+            self._get_key(filename, (target_speed, target_accel, method)) + self.FILE_EXTENSION,
+        )
+        try:
+            # Read the file rather than mapping it, so it can still be evicted
+            sequence = Sequence.from_binary_file(path, memory_map=False)
+        except FileNotFoundError:
+            sequence = Sequence.from_csv(filename, target_speed, target_accel, method=method)
+            # Write to a temporary file first, so other processes never read a partial file
+            temporary_path = f"{path}.{os.getpid()}.tmp"
+            sequence.save_to_binary_file(temporary_path)
+            try:
+                os.replace(temporary_path, path)
+            except OSError:
+                # Another process stored the same sequence first and is still using it
+                os.remove(temporary_path)
+            self._evict()
+        else:
+            # Mark the sequence as recently used
+            os.utime(path)
+        return sequence
 
-        # Append the points
-        for point_index in range(sequence_length):
-            positions = tuple(position_sequences[i][point_index] for i in range(sequence_dim))
-            velocities = tuple(velocity_sequences[i][point_index] for i in range(sequence_dim))
-            time = time_sequence[point_index]
-            generated_sequence.append_point(Point(positions, velocities, time))
-        return generated_sequence
+    def clear(self) -> None:
+        """Remove every cached sequence."""
+        for entry in os.scandir(self._directory):
+            if entry.name.endswith(self.FILE_EXTENSION):
+                os.remove(entry.path)
+
+    def _get_key(self, filename: str, parameters: tuple[float | str | None, ...]) -> str:
+        """
+        Return the key of the sequence generated from a CSV file with the given parameters.
+
+        :param filename: The name of the csv file.
+        :param parameters: The generation parameters.
+        :return: The hexadecimal hash of the file contents, parameters, and code version.
+        """
+        digest = hashlib.sha256(_source_digest())
+        digest.update(repr(parameters).encode())
+        with open(filename, "rb") as file:
+            while chunk := file.read(self.READ_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _evict(self) -> None:
+        """Remove the least recently used sequences until the cache fits in its maximum size."""
+        entries = []
+        for entry in os.scandir(self._directory):
+            if entry.name.endswith(self.FILE_EXTENSION):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self._max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Another process removed it first
+                pass
+            except OSError:
+                # Another process still has it open, so leave it for a later eviction
+                continue
+            total_size -= size
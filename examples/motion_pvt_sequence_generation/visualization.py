@@ -4,6 +4,7 @@ from matplotlib.axes import Axes
 from matplotlib.lines import Line2D
 import matplotlib.pyplot as plt
 import numpy as np
+from numpy.typing import ArrayLike
 
 import pvt
 
@@ -17,8 +18,8 @@ DEFAULT_COLORS: list[str] = plt.rcParams["axes.prop_cycle"].by_key()["color"]
 
 def _plot_trajectory(
     axis: Axes,
-    x_data: list[float],
-    y_data: list[float],
+    x_data: ArrayLike,
+    y_data: ArrayLike,
     color: str | None = None,
     label: str | None = None,
 ) -> Line2D:
@@ -36,8 +37,8 @@ def _plot_trajectory(
 
 def _plot_points(
     axis: Axes,
-    x_data: list[float],
-    y_data: list[float],
+    x_data: ArrayLike,
+    y_data: ArrayLike,
     color: str | None = None,
     label: str | None = None,
 ) -> Line2D:
@@ -57,8 +58,8 @@ def _plot_points(
 
 def _plot_discontinuity(
     axis: Axes,
-    x_data: list[float],
-    y_data: list[float],
+    x_data: ArrayLike,
+    y_data: ArrayLike,
     color: str | None = None,
     label: str | None = None,
 ) -> Line2D:
@@ -83,7 +84,7 @@ def _plot_discontinuity(
     )[0]
 
 
-def plot_pvt_trajectory(
+def plot_pvt_trajectory(  # pylint: disable=too-many-locals
     sequence: pvt.Sequence,
     num_samples: int | None = None,
     axes: list[Axes] | None = None,
@@ -108,10 +109,16 @@ def plot_pvt_trajectory(
     # Create time array
     if num_samples is None:
         num_samples = 1000
-    sampled_times = list(np.linspace(sequence.start_time, sequence.end_time, num_samples))
+    sampled_times = np.linspace(sequence.start_time, sequence.end_time, num_samples)
+    sampled_positions, sampled_velocities, _ = sequence.sample(sampled_times)
     point_times = [p.time for p in points]
     axes[2].set_xlabel("Time")
 
+    # Sample acceleration at the start and end of each segment
+    segment_times = np.array([point_times[:-1], np.array(point_times[1:]) - 1e-12]).T
+    _, _, segment_accelerations = sequence.sample(segment_times)
+    segment_accelerations = segment_accelerations.reshape(len(segment_times), 2, sequence.dim)
+
     for dim_index in range(sequence.dim):
         # Set the color for this dimension
         color = DEFAULT_COLORS[dim_index % len(DEFAULT_COLORS)]
@@ -120,7 +127,7 @@ def plot_pvt_trajectory(
         _plot_trajectory(
             axes[0],
             sampled_times,
-            [sequence.position(t)[dim_index] for t in sampled_times],
+            sampled_positions[:, dim_index],
             color=color,
             label=f"axis {dim_index + 1} trajectory",
         )
@@ -132,7 +139,7 @@ def plot_pvt_trajectory(
         _plot_trajectory(
             axes[1],
             sampled_times,
-            [sequence.velocity(t)[dim_index] for t in sampled_times],
+            sampled_velocities[:, dim_index],
             color,
         )
         _plot_points(axes[1], point_times, [p.velocity[dim_index] for p in points], color)
@@ -143,18 +150,18 @@ def plot_pvt_trajectory(
         previous_accel = None
         for i in range(len(point_times) - 1):
             # Plot segment
-            segment_times = [point_times[i], point_times[i + 1] - 1e-12]
-            segment_accelerations = [sequence.acceleration(t)[dim_index] for t in segment_times]
-            _plot_trajectory(axes[2], segment_times, segment_accelerations, color)
+            _plot_trajectory(
+                axes[2], segment_times[i], segment_accelerations[i, :, dim_index], color
+            )
             # Plot discontinuity
             if previous_accel is not None:
                 _plot_discontinuity(
                     axes[2],
                     [point_times[i]] * 2,
-                    [previous_accel, segment_accelerations[0]],
+                    [previous_accel, segment_accelerations[i, 0, dim_index]],
                     color,
                 )
-            previous_accel = segment_accelerations[1]
+            previous_accel = segment_accelerations[i, 1, dim_index]
         axes[2].set_ylabel("Acceleration")
 
     # Show the plot
@@ -210,13 +217,11 @@ def plot_pvt_path(
     # Create time array
     if num_samples is None:
         num_samples = 1000
-    sampled_times = list(np.linspace(sequence.start_time, sequence.end_time, num_samples))
+    sampled_times = np.linspace(sequence.start_time, sequence.end_time, num_samples)
 
     # Plot position
-    sampled_positions = [
-        [sequence.position(t)[axis_index] for t in sampled_times] for axis_index in axis_indices
-    ]
-    line = axis.plot(*sampled_positions, label="generated path")[0]
+    sampled_positions, _, _ = sequence.sample(sampled_times)
+    line = axis.plot(*sampled_positions[:, axis_indices].T, label="generated path")[0]
     point_positions = [[p.position[axis_index] for p in points] for axis_index in axis_indices]
     axis.plot(*point_positions, "o", mew=MARKER_EDGE_WIDTH, ms=MARKER_SIZE, color=line.get_color())
 